@@ -13,20 +13,30 @@
 # limitations under the License.
 import json
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from itertools import islice
 from logging import getLogger
 from pathlib import Path
-from typing import Optional, Union
+from queue import Queue
+from threading import Thread
+from typing import Any, Iterable, Iterator, List, Optional, TextIO, Union
 
 from deeppavlov.core.commands.utils import import_packages, parse_config
 from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.common.params import from_params
+from deeppavlov.core.common.profiler import ChainerProfiler
 from deeppavlov.core.data.utils import jsonify_data
 from deeppavlov.download import deep_download
 from deeppavlov.utils.pip_wrapper import install_from_config
 
 log = getLogger(__name__)
 
+_STREAM_END = object()
+
+#: number of batches read at once to group input elements of similar length into batches
+SORT_WINDOW_BATCHES = 32
+
 
 def build_model(config: Union[str, Path, dict], mode: str = 'infer',
                 load_trained: bool = False, install: bool = False, download: bool = False) -> Chainer:
@@ -42,7 +52,8 @@ def build_model(config: Union[str, Path, dict], mode: str = 'infer',
 
     model_config = config['chainer']
 
-    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'))
+    model = Chainer(model_config['in'], model_config['out'], model_config.get('in_y'), cache=model_config.get('cache'),
+                    max_workers=model_config.get('max_workers', 1))
 
     for component_config in model_config['pipe']:
         if load_trained and ('fit_on' in component_config or 'in_y' in component_config):
@@ -67,9 +78,11 @@ def build_model(config: Union[str, Path, dict], mode: str = 'infer',
     return model
 
 
-def interact_model(config: Union[str, Path, dict]) -> None:
+def interact_model(config: Union[str, Path, dict], profile: bool = False) -> None:
     """Start interaction with the model described in corresponding configuration file."""
     model = build_model(config)
+    if profile:
+        model.set_profiler(ChainerProfiler())
 
     while True:
         args = []
@@ -77,6 +90,8 @@ def interact_model(config: Union[str, Path, dict]) -> None:
             args.append((input('{}::'.format(in_x)),))
             # check for exit command
             if args[-1][0] in {'exit', 'stop', 'quit', 'q'}:
+                if profile:
+                    print(model.profiler.summary())
                 return
 
         pred = model(*args)
@@ -86,12 +101,124 @@ def interact_model(config: Union[str, Path, dict]) -> None:
         print('>>', *pred)
 
 
+def _read_batches(f: TextIO, batch_size: int, args_count: int) -> Iterator[List[List[str]]]:
+    """Yields batches of model arguments read from the file ``args_count`` lines per element."""
+    while True:
+        batch = list((l.strip() for l in islice(f, batch_size * args_count)))
+
+        if not batch:
+            break
+
+        args = []
+        for i in range(args_count):
+            args.append(batch[i::args_count])
+        yield args
+
+
+def _format_results(res: Any, out_params_count: int) -> str:
+    """Serializes a batch of model results to JSON lines."""
+    if out_params_count == 1:
+        res = [res]
+    return ''.join(json.dumps(jsonify_data(r), ensure_ascii=False) + '\n' for r in zip(*res))
+
+
+def _prefetch(iterable: Iterable, maxsize: int) -> Iterator:
+    """Iterates over ``iterable`` in a separate thread keeping up to ``maxsize`` items ready."""
+    items = Queue(maxsize)
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except Exception as e:
+            items.put((_STREAM_END, e))
+        else:
+            items.put((_STREAM_END, None))
+
+    Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if item is _STREAM_END:
+            if error is not None:
+                raise error
+            break
+        yield item
+
+
+_worker_model: Optional[Chainer] = None
+
+
+def _init_worker(config: Union[str, Path, dict]) -> None:
+    global _worker_model
+    _worker_model = build_model(config)
+
+
+def _predict_batch(args: List[List[str]]) -> str:
+    return _format_results(_worker_model(*args), len(_worker_model.out_params))
+
+
+def _predict_in_threads(model: Chainer, batches: Iterator[List[List[str]]], prefetch: int = 4) -> None:
+    """Overlaps reading of the input, model inference and results serialization."""
+    results = Queue(prefetch)
+    errors = []
+
+    def write() -> None:
+        while True:
+            res = results.get()
+            if res is _STREAM_END:
+                break
+            # after an error the queue is still drained to not block the inference loop
+            if not errors:
+                try:
+                    print(_format_results(res, len(model.out_params)), end='', flush=True)
+                except Exception as e:
+                    errors.append(e)
+
+    writer = Thread(target=write, daemon=True)
+    writer.start()
+    try:
+        for args in _prefetch(batches, prefetch):
+            if errors:
+                break
+            results.put(model(*args))
+    finally:
+        results.put(_STREAM_END)
+        writer.join()
+    if errors:
+        raise errors[0]
+
+
+def _predict_in_processes(config: Union[str, Path, dict], batches: Iterator[List[List[str]]], workers: int) -> None:
+    """Infers batches in a process pool keeping the input order of results."""
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(config,)) as executor:
+        in_flight = deque()
+        for args in batches:
+            in_flight.append(executor.submit(_predict_batch, args))
+            if len(in_flight) >= 2 * workers:
+                print(in_flight.popleft().result(), end='', flush=True)
+        while in_flight:
+            print(in_flight.popleft().result(), end='', flush=True)
+
+
 def predict_on_stream(config: Union[str, Path, dict],
                       batch_size: Optional[int] = None,
-                      file_path: Optional[str] = None) -> None:
-    """Make a prediction with the component described in corresponding configuration file."""
+                      file_path: Optional[str] = None,
+                      profile: bool = False,
+                      pipelined: bool = False,
+                      workers: Optional[int] = None,
+                      sort_by_length: bool = False) -> None:
+    """Make a prediction with the component described in corresponding configuration file.
+
+    If ``pipelined`` is ``True``, input batches are read in advance in a separate thread and results are serialized
+    in another thread while the model processes the next batch. If ``workers`` is greater than one, batches are
+    processed by the given number of processes with a separate model in each process, output order is preserved.
+    If ``sort_by_length`` is ``True``, the input is read by :data:`SORT_WINDOW_BATCHES` batches and elements of
+    similar length are inferred in the same batch with :meth:`Chainer.batched_call`, output order is preserved.
+    If ``profile`` is ``True``, per-component inference statistics are printed to stderr after the prediction.
+    """
 
     batch_size = batch_size or 1
+    workers = workers or 1
     if file_path is None or file_path == '-':
         if sys.stdin.isatty():
             raise RuntimeError('To process data from terminal please use interact mode')
@@ -99,25 +226,33 @@ def predict_on_stream(config: Union[str, Path, dict],
     else:
         f = open(file_path, encoding='utf8')
 
-    model: Chainer = build_model(config)
+    if sort_by_length and (workers > 1 or pipelined):
+        log.warning('Sorting by length is not supported with several workers or in pipelined mode')
+        sort_by_length = False
 
-    args_count = len(model.in_x)
-    while True:
-        batch = list((l.strip() for l in islice(f, batch_size * args_count)))
-
-        if not batch:
-            break
-
-        args = []
-        for i in range(args_count):
-            args.append(batch[i::args_count])
-
-        res = model(*args)
-        if len(model.out_params) == 1:
-            res = [res]
-        for res in zip(*res):
-            res = json.dumps(jsonify_data(res), ensure_ascii=False)
-            print(res, flush=True)
+    if workers > 1:
+        if profile:
+            log.warning('Profiling is not supported with several workers')
+        in_x = parse_config(config)['chainer']['in']
+        args_count = 1 if isinstance(in_x, str) else len(in_x)
+        _predict_in_processes(config, _read_batches(f, batch_size, args_count), workers)
+    else:
+        model: Chainer = build_model(config)
+        if profile:
+            model.set_profiler(ChainerProfiler())
+        window = SORT_WINDOW_BATCHES if sort_by_length else 1
+        batches = _read_batches(f, batch_size * window, len(model.in_x))
+        if pipelined:
+            _predict_in_threads(model, batches)
+        elif sort_by_length:
+            for args in batches:
+                res = model.batched_call(*args, batch_size=batch_size, sort_by_length=True)
+                print(_format_results(res, len(model.out_params)), end='', flush=True)
+        else:
+            for args in batches:
+                print(_format_results(model(*args), len(model.out_params)), end='', flush=True)
+        if profile:
+            print(model.profiler.summary(), file=sys.stderr)
 
     if f is not sys.stdin:
         f.close()
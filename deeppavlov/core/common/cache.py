@@ -0,0 +1,107 @@
+# Copyright 2023 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe dictionary with least recently used eviction and optional expiration of values.
+
+    Args:
+        max_size: maximum number of stored values. If the limit is reached, the least recently used value is removed.
+        ttl: time in seconds after which a value expires. Values never expire if ``ttl`` is ``None``.
+        size_of: function returning the size of a value. If set, ``max_size`` limits the total size of stored
+            values instead of their number and values larger than ``max_size`` are not stored.
+
+    Attributes:
+        hits: number of :meth:`get` calls that found a value.
+        misses: number of :meth:`get` calls that did not find a value.
+
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 size_of: Optional[Callable[[Any], int]] = None) -> None:
+        if max_size < 1:
+            raise ValueError(f'max_size should be positive, got {max_size}')
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size_of = size_of
+        self.hits = 0
+        self.misses = 0
+        self._total_size = 0
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any, int]]' = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, Any, int]]:
+        item = self._data.get(key)
+        if item is not None and self.ttl is not None and time.monotonic() - item[0] > self.ttl:
+            self._remove(key)
+            item = None
+        return item
+
+    def _remove(self, key: Hashable) -> None:
+        self._total_size -= self._data.pop(key)[2]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value stored by ``key`` or ``default`` if there is no such value or the value expired."""
+        with self._lock:
+            item = self._lookup(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return item[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.size_of(value) if self.size_of is not None else 1
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if size > self.max_size:
+                return
+            self._data[key] = (time.monotonic(), value, size)
+            self._total_size += size
+            while self._total_size > self.max_size:
+                self._remove(next(iter(self._data)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._total_size = 0
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, total size of values, hits and misses counters and hit rate."""
+        requests = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'total_size': self._total_size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.
+        }
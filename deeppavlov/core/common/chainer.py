@@ -12,19 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import copy
+import inspect
 import pickle
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
 from itertools import islice
 from logging import getLogger
 from types import FunctionType
-from typing import Union, Tuple, List, Optional, Hashable, Reversible
+from typing import Any, Dict, Union, Tuple, List, Optional, Hashable, Reversible, Sized
 
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.errors import ConfigError
+from deeppavlov.core.common.profiler import ChainerProfiler
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.nn_model import NNModel
 from deeppavlov.core.models.serializable import Serializable
 
 log = getLogger(__name__)
 
+_MISSING = object()
+
 
 class Chainer(Component):
     """
@@ -40,15 +50,24 @@ class Chainer(Component):
         forward_map: list of all variables in chainer's memory after  running every component in ``self.pipe``
         train_map: list of all variables in chainer's memory after  running every component in ``train_pipe.pipe``
         main: reference to the main component
+        profiler: collects per-component inference statistics if set
+        cache: inference results cache, ``None`` if caching is disabled
 
     Args:
         in_x: names of inputs for pipeline inference mode
         out_params: names of pipeline inference outputs
         in_y: names of additional inputs for pipeline training and evaluation modes
+        cache: parameters of :class:`~deeppavlov.core.common.cache.LRUCache` (``max_size`` and ``ttl``) to cache
+            inference results of every batch element. ``max_bytes`` can be set instead of ``max_size`` to limit
+            the total size of pickled results. Every pipeline output has to be a batch of per-element results to
+            use the cache.
+        max_workers: if greater than one, components that don't depend on each other's outputs are run
+            concurrently in a pool of ``max_workers`` threads during inference.
     """
 
     def __init__(self, in_x: Union[str, list] = None, out_params: Union[str, list] = None,
-                 in_y: Union[str, list] = None, *args, **kwargs) -> None:
+                 in_y: Union[str, list] = None, *args, cache: Optional[dict] = None, max_workers: int = 1,
+                 **kwargs) -> None:
         self.pipe: List[Tuple[Tuple[List[str], List[str]], List[str], Component]] = []
         self.train_pipe = []
         if isinstance(in_x, str):
@@ -67,6 +86,10 @@ class Chainer(Component):
         self._components_dict = {}
 
         self.main = None
+        self.profiler: Optional[ChainerProfiler] = None
+        self.cache: Optional[LRUCache] = self._make_cache(**cache) if cache else None
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
 
     def __getitem__(self, item):
         if isinstance(item, int):
@@ -201,13 +224,129 @@ class Chainer(Component):
                 args += list(zip(*y))
             in_params += self.in_y
 
-        return self._compute(*args, pipe=pipe, param_names=in_params, targets=targets)
+        return self._compute(*args, pipe=pipe, param_names=in_params, targets=targets, profiler=self.profiler)
 
     def __call__(self, *args):
-        return self._compute(*args, param_names=self.in_x, pipe=self.pipe, targets=self.out_params)
+        if self.cache is not None and args and len(args[0]) > 0:
+            keys, results, missed = self._cache_lookup(*args)
+            missed_results = None
+            if missed:
+                missed_args = [[arg[positions[0]] for positions in missed.values()] for arg in args]
+                missed_results = self._infer(*missed_args)
+            return self._cache_merge(keys, results, missed, missed_results)
+        return self._infer(*args)
+
+    def _infer(self, *args):
+        if self.max_workers > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+            return self._compute_parallel(*args, param_names=self.in_x, pipe=self.pipe, targets=self.out_params,
+                                          executor=self._executor, profiler=self.profiler)
+        return self._compute(*args, param_names=self.in_x, pipe=self.pipe, targets=self.out_params,
+                             profiler=self.profiler)
+
+    async def acall(self, *args):
+        """Asynchronous version of :meth:`__call__`.
+
+        Components that have an ``acall`` coroutine method or a coroutine ``__call__`` are awaited, other components
+        are run in an executor, so the event loop is not blocked. Components are run one by one in the pipeline
+        order unless ``max_workers`` is greater than one, in which case components that don't depend on each
+        other's outputs run concurrently in the pool of ``max_workers`` threads.
+        """
+        if self.cache is not None and args and len(args[0]) > 0:
+            keys, results, missed = self._cache_lookup(*args)
+            missed_results = None
+            if missed:
+                missed_args = [[arg[positions[0]] for positions in missed.values()] for arg in args]
+                missed_results = await self._ainfer(*missed_args)
+            return self._cache_merge(keys, results, missed, missed_results)
+        return await self._ainfer(*args)
+
+    async def _ainfer(self, *args):
+        concurrent = self.max_workers > 1
+        if concurrent and self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers)
+        return await self._acompute(*args, param_names=self.in_x, pipe=self.pipe, targets=self.out_params,
+                                    executor=self._executor if concurrent else None, concurrent=concurrent,
+                                    profiler=self.profiler)
+
+    @staticmethod
+    def _make_cache(max_size: Optional[int] = None, ttl: Optional[float] = None,
+                    max_bytes: Optional[int] = None) -> LRUCache:
+        if max_bytes is None:
+            return LRUCache(1024 if max_size is None else max_size, ttl)
+        if max_size is not None:
+            raise ConfigError('Only one of max_size and max_bytes cache parameters can be set')
+        return LRUCache(max_bytes, ttl, size_of=lambda result: len(pickle.dumps(result)))
+
+    def _cache_lookup(self, *args) -> Tuple[List[Optional[Hashable]], list, Dict[Hashable, List[int]]]:
+        """Takes results for batch elements from the cache.
+
+        Returns:
+            cache keys of batch elements, results found in the cache (``_MISSING`` for the rest of elements) and
+            positions of missing elements grouped by the key. Equal batch elements are grouped to be computed once,
+            elements without a key are grouped by their position (keys are tuples, so they can't match positions).
+            Cached results are copied, so callers can't modify them.
+        """
+        keys = [self._cache_key(element) for element in zip(*args)]
+        results = [_MISSING if key is None else self.cache.get(key, _MISSING) for key in keys]
+        results = [result if result is _MISSING else copy.deepcopy(result) for result in results]
+        missed = {}
+        for i, result in enumerate(results):
+            if result is _MISSING:
+                missed.setdefault(i if keys[i] is None else keys[i], []).append(i)
+        return keys, results, missed
+
+    def _cache_merge(self, keys: List[Optional[Hashable]], results: list, missed: Dict[Hashable, List[int]],
+                     missed_results: Optional[Union[list, tuple]]):
+        """Puts computed results to the cache and merges them with the cached ones in the input order."""
+        if missed:
+            if len(self.out_params) == 1:
+                missed_results = [missed_results]
+            for positions, result in zip(missed.values(), zip(*missed_results)):
+                results[positions[0]] = result
+                for i in positions[1:]:
+                    results[i] = copy.deepcopy(result)
+                if keys[positions[0]] is not None:
+                    self.cache.put(keys[positions[0]], copy.deepcopy(result))
+
+        res = [list(output) for output in zip(*results)]
+        if len(res) == 1:
+            res = res[0]
+        return res
+
+    @classmethod
+    def _cache_key(cls, value) -> Optional[Hashable]:
+        """Converts a batch element to a hashable cache key, returns ``None`` for unsupported types.
+
+        Keys are tagged with value types, so ``1``, ``1.0`` and ``True`` get different keys. Lists and tuples get
+        the same keys and dicts are compared regardless of the order of items. Dicts with keys that can't be
+        sorted (e.g. keys of different types) are not supported.
+        """
+        if isinstance(value, (str, int, float, bool, bytes)) or value is None:
+            return type(value), value
+        if isinstance(value, (list, tuple)):
+            key = tuple(cls._cache_key(item) for item in value)
+            return None if None in key else (tuple, key)
+        if isinstance(value, dict):
+            items = [(cls._cache_key(k), cls._cache_key(v)) for k, v in value.items()]
+            if any(k is None or v is None for k, v in items):
+                return None
+            try:
+                return dict, tuple(sorted(items))
+            except TypeError:
+                return None
+        return None
+
+    def set_profiler(self, profiler: Optional[ChainerProfiler]) -> None:
+        """Enables collection of per-component inference statistics, ``None`` disables it."""
+        if profiler is not None:
+            profiler.register(self._components_dict, [component for _, _, component in self.train_pipe])
+        self.profiler = profiler
 
     @staticmethod
-    def _compute(*args, param_names, pipe, targets):
+    def _prune_pipe(pipe, param_names, targets) -> list:
+        """Returns only the components of ``pipe`` required to compute ``targets``."""
         expected = set(targets)
         final_pipe = []
         for (in_keys, in_params), out_params, component in reversed(pipe):
@@ -217,17 +356,45 @@ class Chainer(Component):
         final_pipe.reverse()
         if not expected.issubset(param_names):
             raise RuntimeError(f'{expected} are required to compute {targets} but were not found in memory or inputs')
-        pipe = final_pipe
+        return final_pipe
+
+    @staticmethod
+    def _producers(pipe, param_names) -> Tuple[List[Dict[str, Optional[int]]], Dict[str, Optional[int]]]:
+        """Builds the dependency graph of ``pipe`` components.
+
+        Returns:
+            for every component, mapping of its input names to indices of components that produce them, and mapping of
+            all names to the indices of their last producers. Pipeline inputs are produced by ``None``.
+        """
+        producers = dict.fromkeys(param_names)
+        sources = []
+        for i, ((in_keys, in_params), out_params, component) in enumerate(pipe):
+            sources.append({name: producers[name] for name in in_params})
+            producers.update(dict.fromkeys(out_params, i))
+        return sources, producers
+
+    @staticmethod
+    def _call_component(component, in_keys, x: list, profiler: Optional[ChainerProfiler] = None):
+        start_time = time.perf_counter()
+        if in_keys:
+            res = component.__call__(**dict(zip(in_keys, x)))
+        else:
+            res = component.__call__(*x)
+        if profiler is not None:
+            batch_size = len(x[0]) if x and isinstance(x[0], Sized) else 0
+            profiler.record(component, time.perf_counter() - start_time, batch_size)
+        return res
+
+    @staticmethod
+    def _compute(*args, param_names, pipe, targets, profiler: Optional[ChainerProfiler] = None):
+        pipe = Chainer._prune_pipe(pipe, param_names, targets)
 
         mem = dict(zip(param_names, args))
         del args
 
         for (in_keys, in_params), out_params, component in pipe:
             x = [mem[k] for k in in_params]
-            if in_keys:
-                res = component.__call__(**dict(zip(in_keys, x)))
-            else:
-                res = component.__call__(*x)
+            res = Chainer._call_component(component, in_keys, x, profiler)
             if len(out_params) == 1:
                 mem[out_params[0]] = res
             else:
@@ -238,17 +405,132 @@ class Chainer(Component):
             res = res[0]
         return res
 
-    def batched_call(self, *args: Reversible, batch_size: int = 16) -> Union[list, Tuple[list, ...]]:
+    @staticmethod
+    def _compute_parallel(*args, param_names, pipe, targets, executor: Executor,
+                          profiler: Optional[ChainerProfiler] = None):
+        pipe = Chainer._prune_pipe(pipe, param_names, targets)
+        sources, producers = Chainer._producers(pipe, param_names)
+        inputs = dict(zip(param_names, args))
+        del args
+        outputs: List[Optional[Dict[str, Any]]] = [None] * len(pipe)
+        dependencies = [{j for j in component_sources.values() if j is not None} for component_sources in sources]
+
+        def get_value(name: str, producer: Optional[int]) -> Any:
+            return inputs[name] if producer is None else outputs[producer][name]
+
+        def run(i: int) -> Dict[str, Any]:
+            (in_keys, in_params), out_params, component = pipe[i]
+            x = [get_value(name, sources[i][name]) for name in in_params]
+            res = Chainer._call_component(component, in_keys, x, profiler)
+            return {out_params[0]: res} if len(out_params) == 1 else dict(zip(out_params, res))
+
+        pending = list(range(len(pipe)))
+        running: Dict[Future, int] = {}
+        done = set()
+        try:
+            while pending or running:
+                ready = [i for i in pending if dependencies[i] <= done]
+                pending = [i for i in pending if i not in ready]
+                if len(ready) == 1 and not running:
+                    # a single component on the critical path runs without thread switching overhead
+                    outputs[ready[0]] = run(ready[0])
+                    done.add(ready[0])
+                    continue
+                for i in ready:
+                    running[executor.submit(run, i)] = i
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = running.pop(future)
+                    outputs[i] = future.result()
+                    done.add(i)
+        finally:
+            for future in running:
+                future.cancel()
+
+        res = [get_value(k, producers[k]) for k in targets]
+        if len(res) == 1:
+            res = res[0]
+        return res
+
+    @staticmethod
+    async def _acall_component(component, in_keys, x: list, executor: Optional[Executor] = None,
+                               profiler: Optional[ChainerProfiler] = None):
+        """Awaits a coroutine component or runs a sync component in ``executor`` without blocking the event loop."""
+        start_time = time.perf_counter()
+        call = getattr(component, 'acall', None)
+        if not inspect.iscoroutinefunction(call):
+            call = component if inspect.iscoroutinefunction(component) else component.__call__
+        if inspect.iscoroutinefunction(call):
+            res = await (call(**dict(zip(in_keys, x))) if in_keys else call(*x))
+        else:
+            call = partial(call, **dict(zip(in_keys, x))) if in_keys else partial(call, *x)
+            res = await asyncio.get_event_loop().run_in_executor(executor, call)
+        if profiler is not None:
+            batch_size = len(x[0]) if x and isinstance(x[0], Sized) else 0
+            profiler.record(component, time.perf_counter() - start_time, batch_size)
+        return res
+
+    @staticmethod
+    async def _acompute(*args, param_names, pipe, targets, executor: Optional[Executor] = None,
+                        concurrent: bool = False, profiler: Optional[ChainerProfiler] = None):
+        pipe = Chainer._prune_pipe(pipe, param_names, targets)
+        sources, producers = Chainer._producers(pipe, param_names)
+        inputs = dict(zip(param_names, args))
+        del args
+        outputs: List[Dict[str, Any]] = [{} for _ in pipe]
+
+        def get_value(name: str, producer: Optional[int]) -> Any:
+            return inputs[name] if producer is None else outputs[producer][name]
+
+        async def run(i: int) -> None:
+            (in_keys, in_params), out_params, component = pipe[i]
+            x = [get_value(name, sources[i][name]) for name in in_params]
+            res = await Chainer._acall_component(component, in_keys, x, executor, profiler)
+            outputs[i] = {out_params[0]: res} if len(out_params) == 1 else dict(zip(out_params, res))
+
+        if not concurrent:
+            for i in range(len(pipe)):
+                await run(i)
+        else:
+            tasks: List[asyncio.Future] = []
+
+            async def run_after_sources(i: int) -> None:
+                await asyncio.gather(*(tasks[j] for j in set(sources[i].values()) if j is not None))
+                await run(i)
+
+            for i in range(len(pipe)):
+                tasks.append(asyncio.ensure_future(run_after_sources(i)))
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        res = [get_value(k, producers[k]) for k in targets]
+        if len(res) == 1:
+            res = res[0]
+        return res
+
+    def batched_call(self, *args: Reversible, batch_size: int = 16,
+                     sort_by_length: bool = False) -> Union[list, Tuple[list, ...]]:
         """
         Partitions data into mini-batches and applies :meth:`__call__` to each batch.
 
         Args:
             args: input data, each element of the data corresponds to a single model inputs sequence.
             batch_size: the size of a batch.
+            sort_by_length: if ``True``, data elements are sorted by their length before partitioning, so every
+                mini-batch consists of elements of similar length. Output order matches the input order.
 
         Returns:
             the model output as if the data was passed to the :meth:`__call__` method.
         """
+        order = None
+        if sort_by_length:
+            args = [list(arg) for arg in args]
+            order = sorted(range(len(args[0])), key=lambda i: sum(self._length(arg[i]) for arg in args))
+            args = [[arg[i] for i in order] for arg in args]
+
         args = [iter(arg) for arg in args]
         answer = [[] for _ in self.out_params]
 
@@ -264,10 +546,21 @@ class Chainer(Component):
             for y, curr_y in zip(answer, curr_answer):
                 y.extend(curr_y)
 
+        if order is not None:
+            restored_answer = [[None] * len(order) for _ in answer]
+            for y, restored_y in zip(answer, restored_answer):
+                for i, value in zip(order, y):
+                    restored_y[i] = value
+            answer = restored_answer
+
         if len(self.out_params) == 1:
             answer = answer[0]
         return answer
 
+    @staticmethod
+    def _length(item) -> int:
+        return len(item) if isinstance(item, Sized) else 0
+
     def get_main_component(self) -> Optional[Serializable]:
         try:
             return self.main or self.pipe[-1][-1]
@@ -281,6 +574,8 @@ class Chainer(Component):
             main_component.save()
 
     def load(self) -> None:
+        if self.cache is not None:
+            self.cache.clear()
         for in_params, out_params, component in self.train_pipe:
             if callable(getattr(component, 'load', None)):
                 component.load()
@@ -298,4 +593,7 @@ class Chainer(Component):
             self.train_pipe.clear()
         if hasattr(self, 'pipe'):
             self.pipe.clear()
+        if getattr(self, '_executor', None) is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         super().destroy()
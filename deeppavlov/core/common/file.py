@@ -14,15 +14,19 @@
 
 import json
 import pickle
+import re
 from collections import OrderedDict
 from logging import getLogger
 from pathlib import Path
-from typing import Union, Any, Iterable
+from typing import Union, Any, Iterable, Iterator, Tuple
 
 from deeppavlov.core.common.aliases import ALIASES
 
 log = getLogger(__name__)
 
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER_CHARS = re.compile(r'[0-9.eE+-]*')
+
 _red_text, _reset_text_color, _sharp_line = "\x1b[31;20m", "\x1b[0m", '#'*80
 DEPRECATOIN_MSG = f"{_red_text}\n\n{_sharp_line}\n" \
                   "# The model '{0}' has been removed from the DeepPavlov configs.\n" \
@@ -54,6 +58,63 @@ def read_json(fpath: Union[str, Path]) -> dict:
         return json.load(fin, object_pairs_hook=OrderedDict)
 
 
+def iter_json_items(fpath: Union[str, Path], chunk_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    """Yields keys and values of a JSON object from a file without loading the whole object into memory."""
+    decoder = json.JSONDecoder()
+    with open(fpath, encoding='utf8') as fin:
+        buf, pos, eof = '', 0, False
+
+        def read_chunk() -> None:
+            nonlocal buf, pos, eof
+            chunk = fin.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def next_char(consume: bool = True) -> str:
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buf, pos).end()
+                if pos < len(buf):
+                    pos += consume
+                    return buf[pos - consume]
+                if eof:
+                    raise ValueError(f'Unexpected end of JSON file {fpath}')
+                read_chunk()
+
+        def next_value() -> Any:
+            nonlocal pos
+            next_char(consume=False)
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    read_chunk()
+                    continue
+                # a number at the end of the buffer can continue in the next chunk
+                if not eof and _NUMBER_CHARS.match(buf, end).end() == len(buf):
+                    read_chunk()
+                    continue
+                pos = end
+                return value
+
+        if next_char() != '{':
+            raise ValueError(f'JSON file {fpath} does not contain an object')
+        if next_char(consume=False) == '}':
+            return
+        while True:
+            key = next_value()
+            if next_char() != ':':
+                raise ValueError(f'Expected ":" after a key in JSON file {fpath}')
+            yield key, next_value()
+            char = next_char()
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f'Expected "," or "}}" after a value in JSON file {fpath}')
+
+
 def save_json(data: dict, fpath: Union[str, Path]) -> None:
     with open(fpath, 'w', encoding='utf8') as fout:
         json.dump(data, fout, ensure_ascii=False, indent=2)
@@ -0,0 +1,116 @@
+# Copyright 2023 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import Counter
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+ProfilerCallback = Callable[[str, float, int], None]
+
+
+@dataclass
+class ComponentStats:
+    """Accumulated inference statistics of a single pipeline component."""
+    calls: int = 0
+    items: int = 0
+    total_time: float = 0.
+    max_time: float = 0.
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.total_time if self.total_time else 0.
+
+
+class ChainerProfiler:
+    """Collects wall time, batch size and throughput of every component called by a
+    :class:`~deeppavlov.core.common.chainer.Chainer`.
+
+    Components are named by their ``id`` from the config if it is set, otherwise by their class name. Names of
+    components with the same class are suffixed with the component number.
+
+    Args:
+        callbacks: functions called after every component call with component name, call duration in seconds
+            and batch size as arguments.
+
+    Attributes:
+        stats: accumulated statistics by component name.
+
+    """
+
+    def __init__(self, callbacks: Optional[List[ProfilerCallback]] = None) -> None:
+        self.stats: Dict[str, ComponentStats] = {}
+        self.callbacks = callbacks or []
+        self._names: Dict[int, str] = {}
+        self._lock = Lock()
+
+    def register(self, names: Dict[str, Any], components: List[Any]) -> None:
+        """Assigns names to pipeline components.
+
+        Args:
+            names: components by their config ``id``.
+            components: all pipeline components.
+
+        """
+        for name, component in names.items():
+            self._names[id(component)] = name
+        unnamed = [component for component in components if id(component) not in self._names]
+        class_names = Counter(self._class_name(component) for component in unnamed)
+        class_counter = Counter()
+        for component in unnamed:
+            class_name = self._class_name(component)
+            class_counter[class_name] += 1
+            if class_names[class_name] > 1:
+                class_name = f'{class_name}_{class_counter[class_name]}'
+            self._names[id(component)] = class_name
+
+    @staticmethod
+    def _class_name(component: Any) -> str:
+        return getattr(component, '__name__', None) or component.__class__.__name__
+
+    def record(self, component: Any, duration: float, batch_size: int) -> None:
+        """Saves the results of a single component call."""
+        name = self._names.get(id(component)) or self._class_name(component)
+        with self._lock:
+            stats = self.stats.setdefault(name, ComponentStats())
+            stats.calls += 1
+            stats.items += batch_size
+            stats.total_time += duration
+            stats.max_time = max(stats.max_time, duration)
+        for callback in self.callbacks:
+            callback(name, duration, batch_size)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats.clear()
+
+    def summary(self) -> str:
+        """Returns a table with accumulated statistics sorted by total component time."""
+        header = ('component', 'calls', 'items', 'total, s', 'mean, ms', 'max, ms', 'items/s')
+        rows = [header]
+        with self._lock:
+            for name, stats in sorted(self.stats.items(), key=lambda item: -item[1].total_time):
+                rows.append((name, str(stats.calls), str(stats.items), f'{stats.total_time:.3f}',
+                             f'{stats.mean_time * 1000:.2f}', f'{stats.max_time * 1000:.2f}',
+                             f'{stats.throughput:.1f}'))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = ['  '.join(value.ljust(width) if i == 0 else value.rjust(width)
+                           for i, (value, width) in enumerate(zip(row, widths)))
+                 for row in rows]
+        lines.insert(1, '-' * len(lines[0]))
+        return '\n'.join(lines)
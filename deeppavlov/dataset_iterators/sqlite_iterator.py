@@ -13,10 +13,11 @@
 # limitations under the License.
 
 import sqlite3
+import threading
 from logging import getLogger
 from pathlib import Path
 from random import Random
-from typing import List, Any, Dict, Optional, Union, Generator, Tuple
+from typing import List, Any, Dict, Iterable, Optional, Union, Generator, Tuple
 
 from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
@@ -36,9 +37,12 @@ class SQLiteDataIterator(DataFittingIterator):
         batch_size: a number of samples in a single batch
         shuffle: whether to shuffle data during batching
         seed: random seed for data shuffling
+        mmap_size: a number of bytes of the DB file that are memory-mapped by every connection
 
     Attributes:
         connect: a DB connection
+        load_path: a path to local DB file
+        mmap_size: a number of bytes of the DB file that are memory-mapped by every connection
         db_name: a DB name
         doc_ids: DB document ids
         doc2index: a dictionary of document indices and their titles
@@ -48,10 +52,17 @@ class SQLiteDataIterator(DataFittingIterator):
 
     """
 
+    #: maximum number of parameters in a single query supported by all SQLite versions
+    max_query_params = 999
+
     def __init__(self, load_path: Union[str, Path], batch_size: Optional[int] = None,
-                 shuffle: Optional[bool] = None, seed: Optional[int] = None, **kwargs) -> None:
+                 shuffle: Optional[bool] = None, seed: Optional[int] = None, mmap_size: int = 2 ** 30,
+                 **kwargs) -> None:
 
         load_path = str(expand_path(load_path))
+        self.load_path = load_path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
         logger.info("Connecting to database, path: {}".format(load_path))
         try:
             self.connect = sqlite3.connect(load_path, check_same_thread=False)
@@ -109,6 +120,22 @@ class SQLiteDataIterator(DataFittingIterator):
             "SQLite iterator: The size of the database is {} documents".format(len(doc2idx)))
         return doc2idx
 
+    def get_connection(self) -> sqlite3.Connection:
+        """Get a read-only DB connection of the current thread.
+
+        The DB file is opened in immutable mode, so SQLite doesn't lock it and doesn't check it for changes.
+
+        Returns:
+            a DB connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            uri = Path(self.load_path).resolve().as_uri() + '?mode=ro&immutable=1'
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute('PRAGMA mmap_size={}'.format(int(self.mmap_size)))
+            self._local.connection = connection
+        return connection
+
     def get_doc_content(self, doc_id: Any) -> Optional[str]:
         """Get document content by id.
 
@@ -119,7 +146,7 @@ class SQLiteDataIterator(DataFittingIterator):
             document content if success, else raise Exception
 
         """
-        cursor = self.connect.cursor()
+        cursor = self.get_connection().cursor()
         cursor.execute(
             "SELECT text FROM {} WHERE id = ?".format(self.db_name),
             (doc_id,)
@@ -128,6 +155,30 @@ class SQLiteDataIterator(DataFittingIterator):
         cursor.close()
         return result if result is None else result[0]
 
+    def get_docs_content(self, doc_ids: Iterable[Any]) -> List[Optional[str]]:
+        """Get contents of several documents with a single query per :attr:`max_query_params` ids.
+
+        Args:
+            doc_ids: document ids
+
+        Returns:
+            document contents in order of ``doc_ids``, ``None`` for absent documents
+
+        """
+        doc_ids = list(doc_ids)
+        unique_ids = list(dict.fromkeys(doc_ids))
+        contents = {}
+        cursor = self.get_connection().cursor()
+        for i in range(0, len(unique_ids), self.max_query_params):
+            chunk = unique_ids[i:i + self.max_query_params]
+            cursor.execute(
+                "SELECT id, text FROM {} WHERE id IN ({})".format(self.db_name, ', '.join('?' * len(chunk))),
+                chunk
+            )
+            contents.update(cursor.fetchall())
+        cursor.close()
+        return [contents.get(doc_id) for doc_id in doc_ids]
+
     def gen_batches(self, batch_size: int, shuffle: bool = None) \
             -> Generator[Tuple[List[str], List[int]], Any, None]:
         """Gen batches of documents.
@@ -155,13 +206,13 @@ class SQLiteDataIterator(DataFittingIterator):
             batches = [_doc_ids]
 
         for i, doc_ids in enumerate(batches):
-            docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+            docs = self.get_docs_content(doc_ids)
             doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
             yield docs, zip(doc_ids, doc_nums)
 
     def get_instances(self):
         """Get all data"""
         doc_ids = list(self.doc_ids)
-        docs = [self.get_doc_content(doc_id) for doc_id in doc_ids]
+        docs = self.get_docs_content(doc_ids)
         doc_nums = [self.doc2index[doc_id] for doc_id in doc_ids]
         return docs, zip(doc_ids, doc_nums)
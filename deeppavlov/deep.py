@@ -48,6 +48,19 @@ parser.add_argument("--https", action="store_true", default=None, help="run mode
 parser.add_argument("--key", default=None, help="ssl key", type=str)
 parser.add_argument("--cert", default=None, help="ssl certificate", type=str)
 
+parser.add_argument("--dynamic-batching", action="store_true", default=None,
+                    help="coalesce concurrent riseapi and risesocket requests into a single model call")
+
+parser.add_argument("-w", "--workers", default=None, help="number of worker processes in riseapi and predict modes",
+                    type=int)
+parser.add_argument("--pipelined", action="store_true",
+                    help="overlap input reading, inference and output writing in predict mode")
+parser.add_argument("--sort-by-length", action="store_true",
+                    help="group input elements of similar length into batches in predict mode")
+
+parser.add_argument("--profile", action="store_true", default=None,
+                    help="collect per-component inference statistics in interact, predict and riseapi modes")
+
 parser.add_argument("-p", "--port", default=None, help="api port", type=int)
 
 parser.add_argument("--socket-type", default="TCP", type=str, choices={"TCP", "UNIX"})
@@ -70,13 +83,16 @@ def main():
     elif args.mode == 'evaluate':
         train_evaluate_model_from_config(pipeline_config_path, to_train=False, start_epoch_num=args.start_epoch_num)
     elif args.mode == 'interact':
-        interact_model(pipeline_config_path)
+        interact_model(pipeline_config_path, profile=bool(args.profile))
     elif args.mode == 'riseapi':
-        start_model_server(pipeline_config_path, args.https, args.key, args.cert, port=args.port)
+        start_model_server(pipeline_config_path, args.https, args.key, args.cert, port=args.port,
+                           dynamic_batching=args.dynamic_batching, workers=args.workers, profile=args.profile)
     elif args.mode == 'risesocket':
-        start_socket_server(pipeline_config_path, args.socket_type, port=args.port, socket_file=args.socket_file)
+        start_socket_server(pipeline_config_path, args.socket_type, port=args.port, socket_file=args.socket_file,
+                            dynamic_batching=args.dynamic_batching)
     elif args.mode == 'predict':
-        predict_on_stream(pipeline_config_path, args.batch_size, args.file_path)
+        predict_on_stream(pipeline_config_path, args.batch_size, args.file_path, profile=bool(args.profile),
+                          pipelined=args.pipelined, workers=args.workers, sort_by_length=args.sort_by_length)
     elif args.mode == 'crossval':
         if args.folds < 2:
             log.error('Minimum number of Folds is 2')
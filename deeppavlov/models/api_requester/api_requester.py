@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import asyncio
+from functools import partial
 from typing import Any, List, Dict, AsyncIterable
 
 import requests
@@ -60,12 +61,7 @@ class ApiRequester(Component):
         data = kwargs or dict(zip(self.param_names, args))
 
         if self.debatchify:
-            batch_size = 0
-            for v in data.values():
-                batch_size = len(v)
-                break
-
-            assert batch_size > 0
+            batch_size = self._get_batch_size(data)
 
             async def collect():
                 return [j async for j in self.get_async_response(data, batch_size)]
@@ -79,6 +75,38 @@ class ApiRequester(Component):
 
         return response
 
+    async def acall(self, *args: List[Any], **kwargs: Dict[str, Any]):
+        """Asynchronous version of :meth:`__call__` that doesn't block the running event loop.
+
+        Args:
+            *args: list of parameters sent to the API endpoint. Parameter names are taken from self.param_names.
+            **kwargs: named parameters to send to the API endpoint. If not empty, args are ignored
+
+        Returns:
+            result of the API request(s)
+        """
+        data = kwargs or dict(zip(self.param_names, args))
+
+        if self.debatchify:
+            response = [j async for j in self.get_async_response(data, self._get_batch_size(data))]
+            if self.out_count > 1:
+                response = list(zip(*response))
+        else:
+            loop = asyncio.get_event_loop()
+            response = (await loop.run_in_executor(None, partial(requests.post, self.url, json=data))).json()
+
+        return response
+
+    @staticmethod
+    def _get_batch_size(data: dict) -> int:
+        batch_size = 0
+        for v in data.values():
+            batch_size = len(v)
+            break
+
+        assert batch_size > 0
+        return batch_size
+
     async def get_async_response(self, data: dict, batch_size: int) -> AsyncIterable:
         """Helper function for sending requests asynchronously if the API endpoint does not support batching
 
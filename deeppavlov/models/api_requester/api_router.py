@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import concurrent
 from concurrent.futures import ProcessPoolExecutor
 from logging import getLogger
@@ -56,12 +57,25 @@ class ApiRouter(Component):
                        self.api_requesters]
 
             concurrent.futures.wait(futures)
-            results = []
-            for future, api_requester in zip(futures, self.api_requesters):
-                result = future.result()
-                if api_requester.out_count > 1:
-                    results += result
-                else:
-                    results.append(result)
+            return self._merge_results([future.result() for future in futures])
 
+    async def acall(self, *args):
+        """Asynchronous version of :meth:`__call__` that sends requests concurrently in the running event loop.
+
+        Args:
+            *args: list of arguments to forward to the API requesters
+
+        Returns:
+            results of the requests
+        """
+        responses = await asyncio.gather(*(api_requester.acall(*args) for api_requester in self.api_requesters))
+        return self._merge_results(responses)
+
+    def _merge_results(self, responses: list) -> list:
+        results = []
+        for result, api_requester in zip(responses, self.api_requesters):
+            if api_requester.out_count > 1:
+                results += result
+            else:
+                results.append(result)
         return results
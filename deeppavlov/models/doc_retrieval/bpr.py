@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Tuple
+from logging import getLogger
+from typing import Optional, Tuple
 
 import faiss
 import numpy as np
@@ -20,36 +21,79 @@ import torch
 from tqdm import trange
 from transformers import AutoTokenizer, BertModel
 
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.serializable import Serializable
 
+logger = getLogger(__name__)
+
 
 class FaissBinaryIndex:
-    def __init__(self, index: faiss.Index):
-        self.index = index
+    """Binary passage index with float query reranking.
 
-    def search(self, query_embs: np.ndarray, k: int, binary_k=1000, rerank=True) -> Tuple[np.ndarray, np.ndarray]:
-        faiss.omp_set_num_threads(12)
-        num_queries = query_embs.shape[0]
-        bin_query_embs = np.packbits(np.where(query_embs > 0, 1, 0)).reshape(num_queries, -1)
+    Args:
+        index: a binary index with ids mapping
+        n_threads: a number of OpenMP threads used by faiss, faiss default is used if ``None``
+
+    """
+
+    def __init__(self, index: faiss.Index, n_threads: Optional[int] = None):
+        self.index = index
+        if n_threads is not None:
+            faiss.omp_set_num_threads(n_threads)
+        self.id_map = faiss.vector_to_array(index.id_map)
+        self._batch_reconstruction = True
 
+    def reconstruct_batch(self, ids: np.ndarray) -> np.ndarray:
+        """Returns packed binary codes of passages by their internal ids."""
         raw_index = self.index.index
-        _, ids_arr = raw_index.search(bin_query_embs, binary_k)
-        psg_embs = np.vstack([np.unpackbits(raw_index.reconstruct(int(id_))) for id_ in ids_arr.reshape(-1)])
-        psg_embs = psg_embs.reshape(query_embs.shape[0], binary_k, query_embs.shape[1])
-        psg_embs = psg_embs.astype(np.float32)
+        if self._batch_reconstruction:
+            try:
+                return raw_index.reconstruct_batch(ids)
+            except (AttributeError, TypeError):
+                logger.warning('Installed faiss version does not support batch reconstruction of binary codes')
+                self._batch_reconstruction = False
+        return np.vstack([raw_index.reconstruct(int(id_)) for id_ in ids])
 
-        psg_embs = psg_embs * 2 - 1
-        scores_arr = np.einsum("ijk,ik->ij", psg_embs, query_embs)
-        sorted_indices = np.argsort(-scores_arr, axis=1)
+    def search(self, query_embs: np.ndarray, k: int, binary_k=1000, rerank=True) -> Tuple[np.ndarray, np.ndarray]:
+        """Find passages for queries.
 
-        ids_arr = ids_arr[np.arange(num_queries)[:, None], sorted_indices]
-        ids_arr = np.array([self.index.id_map.at(int(id_)) for id_ in ids_arr.reshape(-1)], dtype=np.int)
-        ids_arr = ids_arr.reshape(num_queries, -1)
-        scores_arr = scores_arr[np.arange(num_queries)[:, None], sorted_indices]
+        Args:
+            query_embs: query embeddings
+            k: a number of passages to return for every query
+            binary_k: a number of passages found by hamming distance to rerank
+            rerank: whether to rerank ``binary_k`` passages by inner product of their binary codes with float query
+                embeddings. Passages are ranked by popcount of binary codes of queries and passages otherwise
 
-        return scores_arr[:, :k], ids_arr[:, :k]
+        Returns:
+            a tuple of passage scores and ids
+        """
+        num_queries, dim = query_embs.shape
+        bin_query_embs = np.packbits(query_embs > 0, axis=1)
+
+        raw_index = self.index.index
+        if rerank:
+            _, ids_arr = raw_index.search(bin_query_embs, binary_k)
+            valid = ids_arr >= 0
+            codes = self.reconstruct_batch(np.where(valid, ids_arr, 0).reshape(-1))
+            psg_bits = np.unpackbits(codes, axis=1).reshape(num_queries, binary_k, dim).astype(np.float32)
+            # (2 * bits - 1) . query == 2 * bits . query - sum(query)
+            scores_arr = 2 * np.matmul(psg_bits, query_embs[:, :, None])[..., 0] - query_embs.sum(1, keepdims=True)
+            scores_arr[~valid] = -np.inf
+
+            top = np.argpartition(-scores_arr, k - 1, axis=1)[:, :k] if k < binary_k else \
+                np.tile(np.arange(binary_k), (num_queries, 1))
+            rows = np.arange(num_queries)[:, None]
+            top = top[rows, np.argsort(-scores_arr[rows, top], axis=1)]
+            scores_arr, ids_arr = scores_arr[rows, top], ids_arr[rows, top]
+        else:
+            distances, ids_arr = raw_index.search(bin_query_embs, k)
+            # inner product of +-1 vectors
+            scores_arr = (dim - 2 * distances).astype(np.float32)
+
+        ids_arr = np.where(ids_arr >= 0, self.id_map[ids_arr], -1)
+        return scores_arr, ids_arr
 
 
 @register('bpr')
@@ -61,6 +105,9 @@ class BPR(Component, Serializable):
                  max_query_length: int = 256,
                  top_n: int = 100,
                  device: str = "gpu",
+                 n_threads: Optional[int] = None,
+                 rerank: bool = True,
+                 query_cache_size: int = 1024,
                  *args, **kwargs
                  ):
         super().__init__(save_path=None, load_path=load_path)
@@ -68,11 +115,13 @@ class BPR(Component, Serializable):
         self.bpr_index = bpr_index
         self.top_n = top_n
         self.max_query_length = max_query_length
+        self.rerank = rerank
+        self.query_cache = LRUCache(query_cache_size) if query_cache_size > 0 else None
         self.query_encoder_file = query_encoder_file
         self.tokenizer = AutoTokenizer.from_pretrained(pretrained_model, use_fast=True)
         self.q_encoder = BertModel.from_pretrained(pretrained_model).to(self.device)
         self.load()
-        self.index = FaissBinaryIndex(self.base_index)
+        self.index = FaissBinaryIndex(self.base_index, n_threads)
 
     def load(self):
         checkpoint = torch.load(str(self.load_path / self.query_encoder_file), map_location=self.device)
@@ -82,15 +131,16 @@ class BPR(Component, Serializable):
     def save(self) -> None:
         pass
 
-    def encode_queries(self, queries, batch_size: int = 256) -> np.ndarray:
+    def encode_queries(self, queries, batch_size: int = 256, progress_bar: bool = False) -> np.ndarray:
         embeddings = []
         with torch.no_grad():
-            for start in trange(0, len(queries), batch_size):
+            for start in trange(0, len(queries), batch_size, disable=not progress_bar):
                 model_inputs = self.tokenizer.batch_encode_plus(
                     queries[start: start + batch_size],
                     return_tensors="pt",
                     max_length=self.max_query_length,
-                    padding="max_length",
+                    padding="longest",
+                    truncation=True
                 )
                 model_inputs = {k: v.to(self.device) for k, v in model_inputs.items()}
                 sequence_output = self.q_encoder(**model_inputs)[0]
@@ -99,9 +149,21 @@ class BPR(Component, Serializable):
 
         return np.vstack(embeddings)
 
+    def get_query_embeddings(self, queries) -> np.ndarray:
+        """Encode queries which embeddings are not in the cache."""
+        if self.query_cache is None:
+            return self.encode_queries(queries)
+        embeddings = {query: self.query_cache.get(query) for query in queries}
+        missing = [query for query, emb in embeddings.items() if emb is None]
+        if missing:
+            for query, emb in zip(missing, self.encode_queries(missing)):
+                embeddings[query] = emb
+                self.query_cache.put(query, emb)
+        return np.vstack([embeddings[query] for query in queries])
+
     def __call__(self, queries):
         queries = [query.lower() for query in queries]
-        query_embeddings = self.encode_queries(queries)
-        scores_batch, ids_batch = self.index.search(query_embeddings, self.top_n)
+        query_embeddings = self.get_query_embeddings(queries)
+        scores_batch, ids_batch = self.index.search(query_embeddings, self.top_n, rerank=self.rerank)
         ids_batch = ids_batch.tolist()
         return ids_batch
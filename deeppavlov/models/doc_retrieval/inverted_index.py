@@ -0,0 +1,137 @@
+# Copyright 2023 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from logging import getLogger
+from typing import Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+logger = getLogger(__name__)
+
+
+class ImpactOrderedIndex:
+    """Inverted index over a tfidf matrix with postings lists sorted by term weight.
+
+    Every row of the [hash_size X n_documents] tfidf matrix is a postings list of a term. The index keeps
+    a copy of the postings sorted by weight in descending order and uses the original document ordered rows for
+    random access to the weights of candidate documents.
+
+    Top-k search is exact and uses MaxScore-like early termination. An initial score threshold is the k-th best
+    full score of the documents from the heads of the query postings lists. Terms with the smallest upper bounds
+    whose sum doesn't exceed the threshold are non-essential and their postings are not traversed, the rest of
+    the threshold is divided between essential terms proportionally to their upper bounds. Only the postings with
+    contributions above the term share are read, so a document absent from all read postings can't score above
+    the threshold. Read documents are scored exactly.
+
+    Args:
+        tfidf_matrix: a tfidf csr_matrix with shape [hash_size X n_documents]
+
+    Attributes:
+        matrix: a tfidf matrix with sorted indices, a sorted copy of the given matrix if its indices are not sorted
+        indptr: postings lists offsets
+        doc_indices: document indices of postings sorted by weight within each postings list
+        neg_weights: negated weights of postings sorted within each postings list in ascending order, negation
+         keeps the slices of the array ready for binary search
+
+    """
+
+    def __init__(self, tfidf_matrix: csr_matrix) -> None:
+        if not tfidf_matrix.has_sorted_indices:
+            # the matrix is shared with the vectorizer and may be memory-mapped read-only
+            tfidf_matrix = tfidf_matrix.sorted_indices()
+        self.matrix = tfidf_matrix
+        self.indptr = tfidf_matrix.indptr
+
+        logger.info("Building impact ordered postings lists for {} postings".format(tfidf_matrix.nnz))
+        terms = np.repeat(np.arange(tfidf_matrix.shape[0], dtype=np.int32), np.diff(self.indptr))
+        self.neg_weights = -tfidf_matrix.data
+        order = np.lexsort((self.neg_weights, terms))
+        del terms
+        self.doc_indices = tfidf_matrix.indices[order]
+        self.neg_weights = self.neg_weights[order]
+
+    @property
+    def n_docs(self) -> int:
+        return self.matrix.shape[1]
+
+    def score(self, terms: np.ndarray, term_weights: np.ndarray, docs: np.ndarray) -> np.ndarray:
+        """Compute full scores of documents for a query.
+
+        Args:
+            terms: query term hashes
+            term_weights: query term weights
+            docs: document indices
+
+        Returns:
+            document scores
+        """
+        scores = np.zeros(len(docs), dtype=np.float32)
+        for term, term_weight in zip(terms, term_weights):
+            start, end = self.indptr[term], self.indptr[term + 1]
+            row_docs = self.matrix.indices[start:end]
+            pos = np.searchsorted(row_docs, docs)
+            pos[pos == len(row_docs)] = 0
+            found = row_docs[pos] == docs if len(row_docs) else np.zeros(len(docs), dtype=bool)
+            scores[found] += term_weight * self.matrix.data[start:end][pos[found]]
+        return scores
+
+    def search(self, terms: np.ndarray, term_weights: np.ndarray, top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Find documents with the highest scores for a query.
+
+        Args:
+            terms: query term hashes
+            term_weights: query term weights
+            top_n: a number of documents to return
+
+        Returns:
+            a tuple of indices and scores of at most ``top_n`` documents with nonzero scores sorted by score
+            in descending order
+        """
+        nonempty = (self.indptr[terms + 1] > self.indptr[terms]) & (term_weights > 0)
+        terms, term_weights = terms[nonempty], term_weights[nonempty]
+        starts, ends = self.indptr[terms], self.indptr[terms + 1]
+        if len(terms) == 0 or top_n <= 0:
+            return np.array([], dtype=self.doc_indices.dtype), np.array([], dtype=np.float32)
+
+        upper_bounds = -term_weights * self.neg_weights[starts]
+
+        seed = np.unique(np.concatenate([self.doc_indices[s:min(s + top_n, e)] for s, e in zip(starts, ends)]))
+        seed_scores = self.score(terms, term_weights, seed)
+        threshold = np.partition(seed_scores, -top_n)[-top_n] if len(seed) >= top_n else 0.
+
+        # terms with the smallest upper bounds that can't make a document score above the threshold together
+        order = np.argsort(upper_bounds)
+        n_non_essential = np.searchsorted(np.cumsum(upper_bounds[order]), threshold, side='right')
+        essential = order[n_non_essential:]
+        if len(essential):
+            budget = threshold - upper_bounds[order[:n_non_essential]].sum()
+            shares = budget * upper_bounds[essential] / upper_bounds[essential].sum()
+        else:
+            shares = []
+
+        candidates = [seed]
+        for i, share in zip(essential, shares):
+            n_read = np.searchsorted(self.neg_weights[starts[i]:ends[i]], -share / term_weights[i], side='left')
+            candidates.append(self.doc_indices[starts[i]:starts[i] + n_read])
+        candidates = np.unique(np.concatenate(candidates))
+
+        scores = self.score(terms, term_weights, candidates)
+        if len(candidates) > top_n:
+            top = np.argpartition(-scores, top_n - 1)[:top_n]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top])]
+        top = top[scores[top] > 0]
+        return candidates[top], scores[top]
@@ -13,7 +13,6 @@
 # limitations under the License.
 
 from logging import getLogger
-from operator import itemgetter
 from typing import List, Union, Tuple, Optional
 
 from deeppavlov.core.common.chainer import Chainer
@@ -26,8 +25,9 @@ logger = getLogger(__name__)
 
 @register("logit_ranker")
 class LogitRanker(Component):
-    """Select best answer using squad model logits. Make several batches for a single batch, send each batch
-     to the squad model separately and get a single best answer for each batch.
+    """Select best answer using squad model logits. Contexts of all questions in a batch are split into
+     batches of :attr:`batch_size` pairs of context and question, the batches are sent to the squad model and
+     the best answers are selected for every question.
 
      Args:
         squad_model: a loaded squad model
@@ -79,17 +79,25 @@ class LogitRanker(Component):
         batch_best_answers_place = []
         batch_best_answers_doc_ids = []
         batch_best_answers_sentences = []
-        for quest_ind, [contexts, questions] in enumerate(zip(contexts_batch, questions_batch)):
-            results = []
-            for i in range(0, len(contexts), self.batch_size):
-                c_batch = contexts[i: i + self.batch_size]
-                q_batch = questions[i: i + self.batch_size]
-                batch_predict = list(zip(*self.squad_model(c_batch, q_batch), c_batch))
-                results += batch_predict
+        all_contexts = [context for contexts in contexts_batch for context in contexts]
+        all_questions = [question for contexts, questions in zip(contexts_batch, questions_batch)
+                         for question in questions[:len(contexts)]]
+        all_results = []
+        for i in range(0, len(all_contexts), self.batch_size):
+            c_batch = all_contexts[i: i + self.batch_size]
+            q_batch = all_questions[i: i + self.batch_size]
+            all_results += list(zip(*self.squad_model(c_batch, q_batch), c_batch))
+
+        start = 0
+        for quest_ind, contexts in enumerate(contexts_batch):
+            results = all_results[start: start + len(contexts)]
+            start += len(contexts)
             if self.sort_noans:
-                results_sort = sorted(results, key=lambda x: (x[0] != '', x[2]), reverse=True)
+                doc_ind = sorted(range(len(results)), key=lambda i: (results[i][0] != '', results[i][2]),
+                                 reverse=True)
             else:
-                results_sort = sorted(results, key=itemgetter(2), reverse=True)
+                doc_ind = sorted(range(len(results)), key=lambda i: results[i][2], reverse=True)
+            results_sort = [results[i] for i in doc_ind]
             best_answers = [x[0] for x in results_sort[:self.top_n]]
             best_answers_place = [x[1] for x in results_sort[:self.top_n]]
             best_answers_score = [x[2] for x in results_sort[:self.top_n]]
@@ -104,7 +112,6 @@ class LogitRanker(Component):
             batch_best_answers_sentences.append(best_answers_sentences)
 
             if doc_ids_batch is not None:
-                doc_ind = [results.index(x) for x in results_sort]
                 batch_best_answers_doc_ids.append(
                     [doc_ids_batch[quest_ind][i] for i in doc_ind][:len(batch_best_answers[-1])])
 
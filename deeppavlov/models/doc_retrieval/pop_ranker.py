@@ -12,15 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from array import array
 from logging import getLogger
-from operator import itemgetter
-from typing import List, Any, Tuple
+from pathlib import Path
+from typing import List, Any, Dict, Tuple
 
 import numpy as np
 import joblib
 
 from deeppavlov.core.commands.utils import expand_path
-from deeppavlov.core.common.file import read_json
+from deeppavlov.core.common.file import iter_json_items
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Component
 
@@ -46,8 +47,11 @@ class PopRanker(Component):
          (``False``)
 
     Attributes:
-        pop_dict: a map of article titles to their popularity
-        mean_pop: mean popularity of all popularities in :attr:`pop_dict`, use it when popularity is not found
+        pop_hashes: sorted hashes of article titles
+        pops: popularities of articles in order of :attr:`pop_hashes`
+        collided_pops: popularities of articles which titles have the same hashes, they are not included in
+         :attr:`pop_hashes`
+        mean_pop: mean popularity of all articles, use it when popularity is not found
         clf: a loaded logistic regression classifier
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` or all ids
@@ -58,8 +62,8 @@ class PopRanker(Component):
                  **kwargs) -> None:
         pop_dict_path = expand_path(pop_dict_path)
         logger.debug(f"Reading popularity dictionary from {pop_dict_path}")
-        self.pop_dict = read_json(pop_dict_path)
-        self.mean_pop = np.mean(list(self.pop_dict.values()))
+        self.pop_hashes, self.pops, self.collided_pops, self.mean_pop = self.build_pop_lookup(pop_dict_path)
+        self._collided_hashes = np.array([hash(title) for title in self.collided_pops], dtype=np.int64)
         load_path = expand_path(load_path)
         logger.debug(f"Loading popularity ranker from {load_path}")
         self.clf = joblib.load(load_path)
@@ -81,23 +85,73 @@ class PopRanker(Component):
         """
         batch_ids = []
         batch_scores = []
-        for instance_ids, instance_scores in zip(input_doc_ids, input_doc_scores):
-            instance_probas = []
-            for idx, score in zip(instance_ids, instance_scores):
-                pop = self.pop_dict.get(idx, self.mean_pop)
-                features = [score, pop, score * pop]
-                prob = self.clf.predict_proba([features])
-                instance_probas.append(prob[0][1])
-
-            sort = sorted(enumerate(instance_probas), key=itemgetter(1), reverse=True)
-            sorted_probas = [item[1] for item in sort]
-            sorted_ids = [instance_ids[item[0]] for item in sort]
-
+        lengths = [len(instance_ids) for instance_ids in input_doc_ids]
+        all_ids = [idx for instance_ids in input_doc_ids for idx in instance_ids]
+        if not all_ids:
+            return [[] for _ in input_doc_ids], [[] for _ in input_doc_ids]
+
+        scores = np.array([score for instance_scores, length in zip(input_doc_scores, lengths)
+                           for score in instance_scores[:length]], dtype=np.float64)
+        pops = self.get_pops(all_ids)
+        features = np.stack([scores, pops, scores * pops], axis=1)
+        probas = self.clf.predict_proba(features)[:, 1]
+
+        start = 0
+        for instance_ids, length in zip(input_doc_ids, lengths):
+            instance_probas = probas[start:start + length]
+            start += length
+
+            order = np.argsort(-instance_probas, kind='stable')
             if self.active:
-                sorted_ids = sorted_ids[:self.top_n]
-                sorted_probas = sorted_probas[:self.top_n]
+                order = order[:self.top_n]
 
-            batch_ids.append(sorted_ids)
-            batch_scores.append(sorted_probas)
+            batch_ids.append([instance_ids[i] for i in order])
+            batch_scores.append(instance_probas[order].tolist())
 
         return batch_ids, batch_scores
+
+    @staticmethod
+    def build_pop_lookup(pop_dict_path: Path) -> Tuple[np.ndarray, np.ndarray, Dict[str, float], float]:
+        """Read popularity dictionary from json file to arrays of sorted title hashes and popularities.
+
+        The file is read without building the dictionary in memory. Titles with the same hashes are kept in a
+        dictionary, so their popularities are not mixed up.
+
+        Returns:
+            sorted title hashes, popularities in the same order, a dictionary of popularities of titles with the
+            same hashes and mean popularity
+        """
+        hashes, pops = array('q'), array('d')
+        for title, pop in iter_json_items(pop_dict_path):
+            hashes.append(hash(title))
+            pops.append(pop)
+        hashes, pops = np.frombuffer(hashes, dtype=np.int64), np.frombuffer(pops, dtype=np.float64)
+        mean_pop = float(np.mean(pops)) if len(pops) else 0.
+        order = np.argsort(hashes)
+        hashes, pops = hashes[order], pops[order]
+
+        collided_pops = {}
+        collided_hashes = np.unique(hashes[1:][hashes[1:] == hashes[:-1]])
+        if len(collided_hashes):
+            logger.debug(f"{len(collided_hashes)} hash collisions in popularity dictionary")
+            collided_set = set(collided_hashes.tolist())
+            collided_pops = {title: pop for title, pop in iter_json_items(pop_dict_path)
+                             if hash(title) in collided_set}
+            unique = ~np.isin(hashes, collided_hashes)
+            hashes, pops = hashes[unique], pops[unique]
+        return hashes, pops, collided_pops, mean_pop
+
+    def get_pops(self, doc_ids: List[Any]) -> np.ndarray:
+        """Get popularities of documents, :attr:`mean_pop` is used for unknown documents."""
+        hashes = np.fromiter((hash(idx) for idx in doc_ids), dtype=np.int64, count=len(doc_ids))
+        if len(self.pop_hashes):
+            positions = np.searchsorted(self.pop_hashes, hashes)
+            positions[positions == len(self.pop_hashes)] = 0
+            found = self.pop_hashes[positions] == hashes
+            pops = np.where(found, self.pops[positions], self.mean_pop)
+        else:
+            pops = np.full(len(doc_ids), self.mean_pop, dtype=np.float64)
+        if len(self._collided_hashes):
+            for i in np.flatnonzero(np.isin(hashes, self._collided_hashes)):
+                pops[i] = self.collided_pops.get(doc_ids[i], self.mean_pop)
+        return pops
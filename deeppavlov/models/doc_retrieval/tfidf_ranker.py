@@ -12,14 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import List, Any, Tuple
+from typing import List, Any, Iterator, Optional, Tuple
 
 import numpy as np
 
+from deeppavlov.core.common.errors import ConfigError
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.estimator import Component
-from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
+from deeppavlov.models.doc_retrieval.inverted_index import ImpactOrderedIndex
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer, Sparse
 
 logger = getLogger(__name__)
 
@@ -33,21 +36,40 @@ class TfidfRanker(Component):
         top_n: a number of doc ids to return
         active: whether to return a number specified by :attr:`top_n` (``True``) or all ids
          (``False``)
+        n_workers: a number of threads to compute document scores in; the tfidf matrix is split into
+         :attr:`n_workers` blocks of terms, each block is multiplied by the queries in a separate thread
+        backend: ``'matrix'`` to score all documents by multiplication of queries by the tfidf matrix or
+         ``'inverted_index'`` to search top documents in
+         :class:`~deeppavlov.models.doc_retrieval.inverted_index.ImpactOrderedIndex` built from the tfidf matrix.
+         The index stores an extra copy of the matrix and is used only if :attr:`active` is ``True``
 
     Attributes:
         top_n: a number of doc ids to return
         vectorizer: an instance of vectorizer class
         active: whether to return a number specified by :attr:`top_n` or all ids
+        n_workers: a number of threads to compute document scores in
+        index: an inverted index if :attr:`backend` is ``'inverted_index'``
         index2doc: inverted :attr:`doc_index`
         iterator: a dataset iterator used for generating batches while fitting the vectorizer
 
     """
 
-    def __init__(self, vectorizer: HashingTfIdfVectorizer, top_n=5, active: bool = True, **kwargs):
+    def __init__(self, vectorizer: HashingTfIdfVectorizer, top_n=5, active: bool = True, n_workers: int = 1,
+                 backend: str = 'matrix', **kwargs):
 
         self.top_n = top_n
         self.vectorizer = vectorizer
         self.active = active
+        self.n_workers = n_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._blocks: Optional[List[Tuple[int, int, Sparse]]] = None
+
+        if backend == 'inverted_index':
+            self.index = ImpactOrderedIndex(self.vectorizer.tfidf_matrix)
+        elif backend == 'matrix':
+            self.index = None
+        else:
+            raise ConfigError(f"TfidfRanker backend should be 'matrix' or 'inverted_index', got '{backend}'")
 
     def __call__(self, questions: List[str]) -> Tuple[List[Any], List[float]]:
         """Rank documents and return top n document titles with scores.
@@ -61,26 +83,94 @@ class TfidfRanker(Component):
 
         batch_doc_ids, batch_docs_scores = [], []
         q_tfidfs = self.vectorizer(questions)
-
-        for q_tfidf in q_tfidfs:
-            scores = q_tfidf * self.vectorizer.tfidf_matrix
-            scores = np.squeeze(
-                scores.toarray() + 0.0001)  # add a small value to eliminate zero scores
-
-            if self.active:
-                thresh = self.top_n
-            else:
-                thresh = len(self.vectorizer.doc_index)
-
-            if thresh >= len(scores):
-                o = np.argpartition(-scores, len(scores) - 1)[0:thresh]
+        n_docs = self.vectorizer.tfidf_matrix.shape[1]
+        if self.active:
+            thresh = min(self.top_n, n_docs)
+        else:
+            thresh = n_docs
+
+        for row_indices, row_scores in self._get_candidates(q_tfidfs, thresh):
+            if len(row_scores) > thresh:
+                o = np.argpartition(-row_scores, thresh - 1)[:thresh]
             else:
-                o = np.argpartition(-scores, thresh)[0:thresh]
-            o_sort = o[np.argsort(-scores[o])]
-
-            doc_scores = scores[o_sort]
-            doc_ids = [self.vectorizer.index2doc.get(i, int(i)) for i in o_sort]
+                o = np.arange(len(row_scores))
+            o_sort = o[np.argsort(-row_scores[o])]
+            doc_indices = row_indices[o_sort]
+            doc_scores = row_scores[o_sort]
+
+            # documents without common terms with the query have zero score
+            if len(doc_indices) < thresh:
+                pad_indices = self._get_zero_score_docs(row_indices, thresh - len(doc_indices), n_docs)
+                doc_indices = np.concatenate([doc_indices, pad_indices])
+                doc_scores = np.concatenate([doc_scores, np.zeros(len(pad_indices), dtype=doc_scores.dtype)])
+
+            doc_scores = doc_scores + 0.0001  # add a small value to eliminate zero scores
+            doc_ids = [self.vectorizer.index2doc.get(i, int(i)) for i in doc_indices]
             batch_doc_ids.append(doc_ids)
             batch_docs_scores.append(doc_scores)
 
         return batch_doc_ids, batch_docs_scores
+
+    def _get_candidates(self, q_tfidfs: Sparse, thresh: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield indices and scores of documents that can be in top for every query."""
+        if self.index is not None and self.active:
+            q_tfidfs = q_tfidfs.tocsr()
+            for i in range(q_tfidfs.shape[0]):
+                terms = q_tfidfs.indices[q_tfidfs.indptr[i]:q_tfidfs.indptr[i + 1]]
+                term_weights = q_tfidfs.data[q_tfidfs.indptr[i]:q_tfidfs.indptr[i + 1]]
+                yield self.index.search(terms, term_weights, thresh)
+        else:
+            scores = self.get_scores(q_tfidfs)
+            for i in range(scores.shape[0]):
+                yield scores.indices[scores.indptr[i]:scores.indptr[i + 1]], \
+                      scores.data[scores.indptr[i]:scores.indptr[i + 1]]
+
+    def get_scores(self, q_tfidfs: Sparse) -> Sparse:
+        """Compute scores of all documents for a batch of queries without densifying them.
+
+        Args:
+            q_tfidfs: tfidf vectors of queries with shape [n_queries X hash_size]
+
+        Returns:
+            a csr_matrix of document scores with shape [n_queries X n_documents]
+        """
+        tfidf_matrix = self.vectorizer.tfidf_matrix
+        if self.n_workers <= 1:
+            return (q_tfidfs * tfidf_matrix).tocsr()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.n_workers)
+            self._blocks = self._split_matrix(tfidf_matrix, self.n_workers)
+
+        q_tfidfs = q_tfidfs.tocsc()
+        parts = self._executor.map(lambda block: q_tfidfs[:, block[0]:block[1]] * block[2], self._blocks)
+        return sum(parts, Sparse((q_tfidfs.shape[0], tfidf_matrix.shape[1]), dtype=tfidf_matrix.dtype)).tocsr()
+
+    @staticmethod
+    def _split_matrix(matrix: Sparse, n_blocks: int) -> List[Tuple[int, int, Sparse]]:
+        """Split csr_matrix into blocks of rows sharing the memory with the original matrix.
+
+        Returns:
+            a list of tuples of the first row, the row after the last one and the block matrix
+        """
+        blocks = []
+        bounds = np.linspace(0, matrix.shape[0], n_blocks + 1).astype(int)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            data_start, data_end = matrix.indptr[start], matrix.indptr[end]
+            block = Sparse((matrix.data[data_start:data_end], matrix.indices[data_start:data_end],
+                            matrix.indptr[start:end + 1] - data_start), shape=(end - start, matrix.shape[1]))
+            blocks.append((start, end, block))
+        return blocks
+
+    @staticmethod
+    def _get_zero_score_docs(nonzero_indices: np.ndarray, count: int, n_docs: int) -> np.ndarray:
+        """Return ``count`` smallest document indices that are absent in ``nonzero_indices``."""
+        # at most len(nonzero_indices) of the first count + len(nonzero_indices) indices are taken
+        limit = min(count + len(nonzero_indices), n_docs)
+        pad_indices = np.setdiff1d(np.arange(limit, dtype=nonzero_indices.dtype), nonzero_indices)
+        return pad_indices[:count]
+
+    def destroy(self) -> None:
+        if getattr(self, '_executor', None) is not None:
+            self._executor.shutdown(wait=False)
+        super().destroy()
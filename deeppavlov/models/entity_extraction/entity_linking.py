@@ -14,23 +14,30 @@
 
 import re
 import sqlite3
+import threading
 from logging import getLogger
-from typing import List, Dict, Tuple, Any, Union
-from collections import defaultdict
+from pathlib import Path
+from typing import List, Dict, FrozenSet, Iterable, Optional, Tuple, Any, Union
+from collections import defaultdict, namedtuple
 
 import nltk
+import numpy as np
 import spacy
 from hdt import HDTDocument
 from nltk.corpus import stopwords
 from rapidfuzz import fuzz
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.serializable import Serializable
 from deeppavlov.models.entity_extraction.find_word import WordSearcher
 
 log = getLogger(__name__)
+
+SubstrInfo = namedtuple("SubstrInfo", ["substr", "tags", "use_tags_flag", "new_substr", "init_substr_split",
+                                       "substr_split", "substr_split_lemm", "substr_lemm"])
 nltk.download("stopwords")
 
 
@@ -40,6 +47,9 @@ class EntityLinker(Component, Serializable):
     Class for linking of entity substrings in the document to entities in Wikidata
     """
 
+    #: maximum number of queries in a single compound SELECT supported by SQLite by default
+    max_compound_select = 500
+
     def __init__(
             self,
             load_path: str,
@@ -61,6 +71,11 @@ class EntityLinker(Component, Serializable):
             use_connections: bool = False,
             kb_filename: str = None,
             prefixes: Dict[str, Any] = None,
+            fts_cache_size: int = 10000,
+            mmap_size: int = 2 ** 30,
+            db_cache_size: int = 65536,
+            conn_cache_size: int = 100000,
+            adjacency_filename: str = None,
             **kwargs,
     ) -> None:
         """
@@ -87,6 +102,14 @@ class EntityLinker(Component, Serializable):
             use_connections: whether to rank entities by connections in the knowledge graph
             kb_filename: filename with the knowledge base in HDT format
             prefixes: entity and title prefixes
+            fts_cache_size: number of the most recent full-text search queries to the entities database which
+                results are kept in memory, results are not kept if 0
+            mmap_size: number of bytes of the entities database file that are memory-mapped by every connection
+            db_cache_size: size of the page cache of every connection to the entities database in KiB
+            conn_cache_size: number of entities which neighbours in the knowledge graph are kept in memory for
+                ranking by connections, neighbours are not kept if 0
+            adjacency_filename: filename with neighbours of entities precomputed with :meth:`save_adjacency`,
+                neighbours of other entities are found in the knowledge base
             **kwargs:
         """
         super().__init__(save_path=None, load_path=load_path)
@@ -125,18 +148,46 @@ class EntityLinker(Component, Serializable):
             self.word_searcher = WordSearcher(words_dict_filename, ngrams_matrix_filename, self.lang)
         self.kb_filename = kb_filename
         self.prefixes = prefixes
+        self.fts_cache = LRUCache(fts_cache_size) if fts_cache_size > 0 else None
+        self.mmap_size = mmap_size
+        self.db_cache_size = db_cache_size
+        self.conn_cache = LRUCache(conn_cache_size) if conn_cache_size > 0 else None
+        self.adjacency_filename = adjacency_filename
         self.load()
 
     def load(self) -> None:
-        self.conn = sqlite3.connect(str(self.load_path / self.entities_database_filename))
-        self.cur = self.conn.cursor()
+        self.db_path = self.load_path / self.entities_database_filename
+        self._local = threading.local()
+        self.get_connection()
         self.kb = None
         if self.kb_filename:
             self.kb = HDTDocument(str(expand_path(self.kb_filename)))
+        self.adjacency = None
+        if self.adjacency_filename:
+            loader = np.load(str(expand_path(self.adjacency_filename)))
+            self.adjacency = loader["entity_ids"], loader["indptr"], loader["neighbours"]
 
     def save(self) -> None:
         pass
 
+    def get_connection(self) -> sqlite3.Connection:
+        """Get a read-only connection to the entities database of the current thread.
+
+        The database file is opened in immutable mode, so SQLite doesn't lock it and doesn't check it for changes,
+        and the connections of concurrent requests don't block each other.
+
+        Returns:
+            a database connection
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            uri = self.db_path.resolve().as_uri() + '?mode=ro&immutable=1'
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            connection.execute(f"PRAGMA cache_size={-int(self.db_cache_size)}")
+            self._local.connection = connection
+        return connection
+
     def __call__(
             self,
             substr_batch: List[List[str]],
@@ -177,13 +228,27 @@ class EntityLinker(Component, Serializable):
                     end_offset = st_offset + len(substr)
                     offsets_list.append([st_offset, end_offset])
                 offsets_batch.append(offsets_list)
+        substr_info_batch = [[self.prepare_substr(substr, tags) for substr, tags in zip(substr_list, tags_list)]
+                             for substr_list, tags_list in zip(substr_batch, tags_batch)]
+        # search candidates for all substrings of the batch at once, find_exact_match and find_fuzzy_match take
+        # them from the cache
+        if self.fts_cache is not None:
+            self.search_titles(key for substr_info_list in substr_info_batch for substr_info in substr_info_list
+                               if substr_info is not None for key in self.get_lookup_keys(substr_info))
+        cand_ent_init_iter = iter(self.find_candidates([substr_info for substr_info_list in substr_info_batch
+                                                         for substr_info in substr_info_list]))
+        cand_ent_init_batch = [[next(cand_ent_init_iter) for _ in substr_info_list]
+                               for substr_info_list in substr_info_batch]
         ids_batch, conf_batch, pages_batch, labels_batch = [], [], [], []
         for substr_list, offsets_list, tags_list, probas_list, sentences_list, sentences_offsets_list, \
-            entities_to_link in zip(substr_batch, offsets_batch, tags_batch, probas_batch, sentences_batch,
-                                    sentences_offsets_batch, entities_to_link_batch):
+            entities_to_link, substr_info_list, cand_ent_init_list in zip(substr_batch, offsets_batch, tags_batch,
+                                                                          probas_batch, sentences_batch,
+                                                                          sentences_offsets_batch,
+                                                                          entities_to_link_batch, substr_info_batch,
+                                                                          cand_ent_init_batch):
             ids_list, conf_list, pages_list, labels_list = \
                 self.link_entities(substr_list, offsets_list, tags_list, probas_list, sentences_list,
-                                   sentences_offsets_list, entities_to_link)
+                                   sentences_offsets_list, entities_to_link, substr_info_list, cand_ent_init_list)
             log.debug(f"ids_list {ids_list} conf_list {conf_list}")
             if self.num_entities_to_return == 1:
                 pages_list = [pages[0] for pages in pages_list]
@@ -203,91 +268,20 @@ class EntityLinker(Component, Serializable):
             probas_list: List[float],
             sentences_list: List[str],
             sentences_offsets_list: List[List[int]],
-            entities_to_link: List[int]
+            entities_to_link: List[int],
+            substr_info_list: List[Optional[SubstrInfo]] = None,
+            cand_ent_init_list: List[Dict[str, set]] = None
     ) -> Tuple[List[Any], List[Any], List[List[Union[str, Any]]], List[List[Union[str, Any]]]]:
         log.debug(f"substr_list {substr_list} tags_list {tags_list} probas {probas_list} offsets_list {offsets_list}")
         ids_list, conf_list, pages_list, label_list, descr_list = [], [], [], [], []
         if substr_list:
             entities_scores_list = []
             cand_ent_scores_list = []
-            for substr, tags, proba in zip(substr_list, tags_list, probas_list):
-                for old_symb, new_symb in [("'s", ""), ("@", ""), ("  ", " "), (".", ""), (",", ""), ("-", " "),
-                                           ("'", " "), ("!", ""), (":", ""), ("&", ""), ("/", " "), ('"', ""),
-                                           ("  ", " ")]:
-                    substr = substr.replace(old_symb, new_symb)
-                substr = substr.strip()
-                cand_ent_init = defaultdict(set)
-                if len(substr) > 1:
-                    if isinstance(tags, str):
-                        tags = [tags]
-                    tags = [tag.lower() for tag in tags]
-                    if tags and not isinstance(tags[0], (list, tuple)):
-                        tags = [(tag, 1.0) for tag in tags]
-                    if tags and tags[0][0] == "e":
-                        use_tags_flag = False
-                    else:
-                        use_tags_flag = True
-                    cand_ent_init = self.find_exact_match(substr, tags, use_tags=use_tags_flag)
-                    new_substr = re.sub(r"\b([a-z]{1}) ([a-z]{1})\b", r"\1\2", substr)
-                    if substr != new_substr:
-                        new_cand_ent_init = self.find_exact_match(new_substr, tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-
-                    init_substr_split = substr.lower().split(" ")
-                    if tags[0][0] in {"person", "work_of_art"}:
-                        substr_split = [word for word in substr.lower().split(" ") if len(word) > 0]
-                    else:
-                        substr_split = [word for word in substr.lower().split(" ")
-                                        if word not in self.stopwords and len(word) > 0]
-
-                    substr_split_lemm = [self.nlp(tok)[0].lemma_ for tok in substr_split]
-                    substr_lemm = " ".join(substr_split_lemm)
-                    if substr_split != substr_split_lemm \
-                            or (tags[0][0] == "work_of_art"
-                                and len(substr_split) != len(init_substr_split)):
-                        new_cand_ent_init = self.find_fuzzy_match(substr_split, tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-                    if substr_split != substr_split_lemm:
-                        new_cand_ent_init = self.find_exact_match(substr_lemm, tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-                        new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-
-                    all_low_conf = self.define_all_low_conf(cand_ent_init, 1.0)
-                    clean_tags, corr_tags, corr_clean_tags = self.correct_tags(tags)
-                    log.debug(f"substr: {substr} --- lemm: {substr_split_lemm} --- tags: {tags} --- corr_tags: "
-                              f"{corr_tags} --- all_low_conf: {all_low_conf} --- cand_ent_init: {len(cand_ent_init)}")
-
-                    if (not cand_ent_init or all_low_conf) and corr_tags:
-                        corr_cand_ent_init = self.find_exact_match(substr, corr_tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, corr_cand_ent_init)
-                        if substr_split != substr_split_lemm:
-                            new_cand_ent_init = self.find_exact_match(substr_lemm, corr_tags, use_tags=use_tags_flag)
-                            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-                            new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, corr_tags,
-                                                                      use_tags=use_tags_flag)
-                            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-
-                    if not cand_ent_init and len(substr_split) == 1 and self.word_searcher:
-                        corr_words = self.word_searcher(substr_split[0], set(clean_tags + corr_clean_tags))
-                        if corr_words:
-                            cand_ent_init = self.find_exact_match(corr_words[0], tags + corr_tags,
-                                                                  use_tags=use_tags_flag)
-
-                    if not cand_ent_init and len(substr_split) > 1:
-                        cand_ent_init = self.find_fuzzy_match(substr_split, tags)
-
-                    all_low_conf = self.define_all_low_conf(cand_ent_init, 0.85)
-                    if (not cand_ent_init or all_low_conf) and tags[0][0] != "t":
-                        use_tags_flag = False
-                        new_cand_ent_init = self.find_exact_match(substr, tags, use_tags=use_tags_flag)
-                        cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-                        if substr_split != substr_split_lemm and (tags[0][0] == "e" or not cand_ent_init):
-                            new_cand_ent_init = self.find_fuzzy_match(substr_split, tags, use_tags=use_tags_flag)
-                            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-                            new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, tags, use_tags=use_tags_flag)
-                            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
-
+            if substr_info_list is None:
+                substr_info_list = [self.prepare_substr(substr, tags) for substr, tags in zip(substr_list, tags_list)]
+            if cand_ent_init_list is None:
+                cand_ent_init_list = self.find_candidates(substr_info_list)
+            for cand_ent_init in cand_ent_init_list:
                 cand_ent_scores = []
                 for entity in cand_ent_init:
                     entities_scores = list(cand_ent_init[entity])
@@ -312,7 +306,7 @@ class EntityLinker(Component, Serializable):
                 descr_list.append([elem[6] for elem in cand_ent_scores])
 
             scores_dict = {}
-            if self.use_connections and self.kb:
+            if self.use_connections and (self.kb or self.adjacency is not None):
                 scores_dict = self.rank_by_connections(ids_list)
 
             substr_lens = [len(entity_substr.split()) for entity_substr in substr_list]
@@ -334,6 +328,148 @@ class EntityLinker(Component, Serializable):
                 f_label_list.append(labels)
         return f_ids_list, f_conf_list, f_pages_list, f_label_list
 
+    def prepare_substr(self, substr: str, tags: Union[str, List[Any]]) -> Optional[SubstrInfo]:
+        """Clean the substring, normalize its tags and find its tokens and lemmas used to search candidates.
+
+        Returns:
+            substring info or ``None`` if the cleaned substring is too short to search candidates for it
+        """
+        substr = self.clean_substr(substr)
+        if len(substr) <= 1:
+            return None
+        if isinstance(tags, str):
+            tags = [tags]
+        tags = [tag.lower() for tag in tags]
+        if tags and not isinstance(tags[0], (list, tuple)):
+            tags = [(tag, 1.0) for tag in tags]
+        use_tags_flag = not (tags and tags[0][0] == "e")
+        new_substr = re.sub(r"\b([a-z]{1}) ([a-z]{1})\b", r"\1\2", substr)
+
+        init_substr_split = substr.lower().split(" ")
+        if tags[0][0] in {"person", "work_of_art"}:
+            substr_split = [word for word in substr.lower().split(" ") if len(word) > 0]
+        else:
+            substr_split = [word for word in substr.lower().split(" ")
+                            if word not in self.stopwords and len(word) > 0]
+
+        substr_split_lemm = [self.nlp(tok)[0].lemma_ for tok in substr_split]
+        substr_lemm = " ".join(substr_split_lemm)
+        return SubstrInfo(substr, tags, use_tags_flag, new_substr, init_substr_split, substr_split,
+                          substr_split_lemm, substr_lemm)
+
+    def get_lookup_keys(self, substr_info: SubstrInfo) -> List[str]:
+        """Full-text search queries which :meth:`link_entities` sends for the substring regardless of found
+        candidates. Queries for related tags, corrected words and fallback searches depend on the candidates
+        found by these queries and are sent from :meth:`link_entities`.
+        """
+        substr, tags, _, new_substr, init_substr_split, substr_split, substr_split_lemm, substr_lemm = substr_info
+        keys = self.get_exact_match_keys(substr, tags)
+        if substr != new_substr:
+            keys += self.get_exact_match_keys(new_substr, tags)
+        if substr_split != substr_split_lemm \
+                or (tags[0][0] == "work_of_art" and len(substr_split) != len(init_substr_split)):
+            keys += self.get_fuzzy_match_keys(substr_split, tags)
+        if substr_split != substr_split_lemm:
+            keys += self.get_exact_match_keys(substr_lemm, tags)
+            keys += self.get_fuzzy_match_keys(substr_split_lemm, tags)
+        return keys
+
+    def find_candidates(self, substr_info_list: List[Optional[SubstrInfo]]) -> List[Dict[str, set]]:
+        """Find candidate entities for substrings.
+
+        Words of single-word substrings without candidates are corrected by the word searcher with a single
+        :meth:`WordSearcher.find_words` call for all substrings.
+
+        Returns:
+            dictionaries of candidate entity scores by entity id for every substring
+        """
+        cand_ent_init_list = [defaultdict(set) if substr_info is None else self.find_initial_candidates(substr_info)
+                              for substr_info in substr_info_list]
+        corr_words_list = [[] for _ in substr_info_list]
+        if self.word_searcher:
+            to_correct = [i for i, (substr_info, cand_ent_init) in enumerate(zip(substr_info_list, cand_ent_init_list))
+                          if substr_info is not None and not cand_ent_init and len(substr_info.substr_split) == 1]
+            queries, tags_list = [], []
+            for i in to_correct:
+                clean_tags, _, corr_clean_tags = self.correct_tags(substr_info_list[i].tags)
+                queries.append(substr_info_list[i].substr_split[0])
+                tags_list.append(set(clean_tags + corr_clean_tags))
+            if queries:
+                for i, corr_words in zip(to_correct, self.word_searcher.find_words(queries, tags_list)):
+                    corr_words_list[i] = corr_words
+        return [cand_ent_init if substr_info is None
+                else self.find_fallback_candidates(substr_info, cand_ent_init, corr_words)
+                for substr_info, cand_ent_init, corr_words in zip(substr_info_list, cand_ent_init_list,
+                                                                  corr_words_list)]
+
+    def find_initial_candidates(self, substr_info: SubstrInfo) -> Dict[str, set]:
+        """Find candidate entities for the substring, its lemmas and related tags."""
+        substr, tags, use_tags_flag, new_substr, init_substr_split, substr_split, substr_split_lemm, \
+            substr_lemm = substr_info
+        cand_ent_init = self.find_exact_match(substr, tags, use_tags=use_tags_flag)
+        if substr != new_substr:
+            new_cand_ent_init = self.find_exact_match(new_substr, tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+
+        if substr_split != substr_split_lemm \
+                or (tags[0][0] == "work_of_art"
+                    and len(substr_split) != len(init_substr_split)):
+            new_cand_ent_init = self.find_fuzzy_match(substr_split, tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+        if substr_split != substr_split_lemm:
+            new_cand_ent_init = self.find_exact_match(substr_lemm, tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+            new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+
+        all_low_conf = self.define_all_low_conf(cand_ent_init, 1.0)
+        clean_tags, corr_tags, corr_clean_tags = self.correct_tags(tags)
+        log.debug(f"substr: {substr} --- lemm: {substr_split_lemm} --- tags: {tags} --- corr_tags: "
+                  f"{corr_tags} --- all_low_conf: {all_low_conf} --- cand_ent_init: {len(cand_ent_init)}")
+
+        if (not cand_ent_init or all_low_conf) and corr_tags:
+            corr_cand_ent_init = self.find_exact_match(substr, corr_tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, corr_cand_ent_init)
+            if substr_split != substr_split_lemm:
+                new_cand_ent_init = self.find_exact_match(substr_lemm, corr_tags, use_tags=use_tags_flag)
+                cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+                new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, corr_tags,
+                                                          use_tags=use_tags_flag)
+                cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+        return cand_ent_init
+
+    def find_fallback_candidates(self, substr_info: SubstrInfo, cand_ent_init: Dict[str, set],
+                                 corr_words: List[str]) -> Dict[str, set]:
+        """Find candidate entities by corrected words, substring words or without tags if
+        :meth:`find_initial_candidates` found no candidates or only candidates with low scores.
+        """
+        substr, tags, use_tags_flag, _, _, substr_split, substr_split_lemm, _ = substr_info
+        _, corr_tags, _ = self.correct_tags(tags)
+        if not cand_ent_init and corr_words:
+            cand_ent_init = self.find_exact_match(corr_words[0], tags + corr_tags, use_tags=use_tags_flag)
+
+        if not cand_ent_init and len(substr_split) > 1:
+            cand_ent_init = self.find_fuzzy_match(substr_split, tags)
+
+        all_low_conf = self.define_all_low_conf(cand_ent_init, 0.85)
+        if (not cand_ent_init or all_low_conf) and tags[0][0] != "t":
+            use_tags_flag = False
+            new_cand_ent_init = self.find_exact_match(substr, tags, use_tags=use_tags_flag)
+            cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+            if substr_split != substr_split_lemm and (tags[0][0] == "e" or not cand_ent_init):
+                new_cand_ent_init = self.find_fuzzy_match(substr_split, tags, use_tags=use_tags_flag)
+                cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+                new_cand_ent_init = self.find_fuzzy_match(substr_split_lemm, tags, use_tags=use_tags_flag)
+                cand_ent_init = self.unite_dicts(cand_ent_init, new_cand_ent_init)
+        return cand_ent_init
+
+    def clean_substr(self, substr: str) -> str:
+        for old_symb, new_symb in [("'s", ""), ("@", ""), ("  ", " "), (".", ""), (",", ""), ("-", " "),
+                                   ("'", " "), ("!", ""), (":", ""), ("&", ""), ("/", " "), ('"', ""),
+                                   ("  ", " ")]:
+            substr = substr.replace(old_symb, new_symb)
+        return substr.strip()
+
     def define_all_low_conf(self, cand_ent_init, thres):
         all_low_conf = True
         for entity_id in cand_ent_init:
@@ -381,42 +517,90 @@ class EntityLinker(Component, Serializable):
                 entity_substr = entity_substr_split[-1]
         return entity_substr
 
-    def find_exact_match(self, entity_substr, tags, use_tags=True):
+    def search_titles(self, words: Iterable[str]) -> Dict[str, List[Tuple]]:
+        """Find entities by titles with full-text search queries to the entities database.
+
+        Results are taken from the cache if possible, the rest of the queries are sent to the database in bulk.
+
+        Args:
+            words: full-text search queries
+
+        Returns:
+            a dictionary of found entities by query
+        """
+        found, missing = {}, []
+        for word in dict.fromkeys(words):
+            entities_and_ids = self.fts_cache.get(word) if self.fts_cache is not None else None
+            if entities_and_ids is None:
+                missing.append(word)
+            else:
+                found[word] = entities_and_ids
+        for i in range(0, len(missing), self.max_compound_select):
+            for word, entities_and_ids in self._execute_fts(missing[i:i + self.max_compound_select]).items():
+                found[word] = entities_and_ids
+                if self.fts_cache is not None:
+                    self.fts_cache.put(word, entities_and_ids)
+        return found
+
+    def _execute_fts(self, words: List[str]) -> Dict[str, List[Tuple]]:
+        query = " UNION ALL ".join(f"SELECT {i}, * FROM inverted_index WHERE title MATCH ?" for i in range(len(words)))
+        results = {word: [] for word in words}
+        try:
+            for row in self.get_connection().execute(query, words).fetchall():
+                results[words[row[0]]].append(row[1:])
+        except sqlite3.Error:
+            if len(words) == 1:
+                log.info(f"error in query execute {query}")
+            else:
+                # find the queries with errors
+                for word in words:
+                    results.update(self._execute_fts([word]))
+        return results
+
+    def get_exact_match_keys(self, entity_substr, tags):
         entity_substr = entity_substr.lower()
-        entity_substr_split = entity_substr.split()
-        cand_ent_init = defaultdict(set)
-        for tag, tag_conf in tags:
+        tag_substrs = []
+        for tag, _ in tags:
             entity_substr = self.sanitize_substr(entity_substr, tag)
-            query = "SELECT * FROM inverted_index WHERE title MATCH ?;"
-            entities_and_ids = []
-            try:
-                res = self.cur.execute(query, (entity_substr,))
-                entities_and_ids = res.fetchall()
-            except:
-                log.info(f"error in query execute {query}")
+            tag_substrs.append(entity_substr)
+        return tag_substrs
+
+    def find_exact_match(self, entity_substr, tags, use_tags=True):
+        entity_substr_split = entity_substr.lower().split()
+        cand_ent_init = defaultdict(set)
+        tag_substrs = self.get_exact_match_keys(entity_substr, tags)
+        found = self.search_titles(tag_substrs)
+        for (tag, tag_conf), tag_substr in zip(tags, tag_substrs):
+            entities_and_ids = found[tag_substr]
             if entities_and_ids:
                 cand_ent_init = self.process_cand_ent(
                     cand_ent_init, entities_and_ids, entity_substr_split, tag, tag_conf, use_tags)
         return cand_ent_init
 
-    def find_fuzzy_match(self, entity_substr_split, tags, use_tags=True):
-        cand_ent_init = defaultdict(set)
-        for tag, tag_conf in tags:
+    def get_fuzzy_match_splits(self, entity_substr_split, tags):
+        tag_substr_splits = []
+        for _ in tags:
             if len(entity_substr_split) > 3:
                 entity_substr_split = [" ".join(entity_substr_split[i:i + 2])
                                        for i in range(len(entity_substr_split) - 1)]
-            for word in entity_substr_split:
+            tag_substr_splits.append(entity_substr_split)
+        return tag_substr_splits
+
+    def get_fuzzy_match_keys(self, entity_substr_split, tags):
+        return [word for substr_split in self.get_fuzzy_match_splits(entity_substr_split, tags)
+                for word in substr_split if len(word) > 1 and word not in self.stopwords]
+
+    def find_fuzzy_match(self, entity_substr_split, tags, use_tags=True):
+        cand_ent_init = defaultdict(set)
+        tag_substr_splits = self.get_fuzzy_match_splits(entity_substr_split, tags)
+        found = self.search_titles(self.get_fuzzy_match_keys(entity_substr_split, tags))
+        for (tag, tag_conf), substr_split in zip(tags, tag_substr_splits):
+            for word in substr_split:
                 if len(word) > 1 and word not in self.stopwords:
-                    query = "SELECT * FROM inverted_index WHERE title MATCH ?;"
-                    part_entities_and_ids = []
-                    try:
-                        res = self.cur.execute(query, (word,))
-                        part_entities_and_ids = res.fetchall()
-                    except:
-                        log.info(f"error in query execute {query}")
+                    part_entities_and_ids = found[word]
                     if part_entities_and_ids:
                         cand_ent_init = self.process_cand_ent(
-                            cand_ent_init, part_entities_and_ids, entity_substr_split, tag, tag_conf, use_tags)
+                            cand_ent_init, part_entities_and_ids, substr_split, tag, tag_conf, use_tags)
         return cand_ent_init
 
     def match_tokens(self, entity_substr_split, label_tokens):
@@ -680,42 +864,79 @@ class EntityLinker(Component, Serializable):
             return f_top_entities, f_top_conf
         return top_entities, top_conf
 
+    def get_neighbours(self, entity_id: str) -> FrozenSet[str]:
+        """Get entities which are objects of triplets with the entity as a subject in the knowledge graph.
+
+        Neighbours are taken from the cache, from the precomputed adjacency file or found in the knowledge base.
+
+        Args:
+            entity_id: entity id
+
+        Returns:
+            ids of neighbour entities
+        """
+        neighbours = self.conn_cache.get(entity_id) if self.conn_cache is not None else None
+        if neighbours is not None:
+            return neighbours
+        if self.adjacency is not None:
+            entity_ids, indptr, adj_neighbours = self.adjacency
+            pos = np.searchsorted(entity_ids, entity_id)
+            if pos < len(entity_ids) and entity_ids[pos] == entity_id:
+                neighbours = frozenset(adj_neighbours[indptr[pos]:indptr[pos + 1]].tolist())
+        if neighbours is None:
+            neighbours = self.search_neighbours(entity_id) if self.kb else frozenset()
+        if self.conn_cache is not None:
+            self.conn_cache.put(entity_id, neighbours)
+        return neighbours
+
+    def search_neighbours(self, entity_id: str) -> FrozenSet[str]:
+        objects = set()
+        for prefix in self.prefixes["entity"]:
+            tr, _ = self.kb.search_triples(f"{prefix}/{entity_id}", "", "")
+            for subj, rel, obj in tr:
+                if rel.split("/")[-1] not in {"P31", "P279"}:
+                    if any([obj.startswith(pr) for pr in self.prefixes["entity"]]):
+                        objects.add(obj.split("/")[-1])
+                    if rel.startswith(self.prefixes["rels"]["no_type"]):
+                        tr2, _ = self.kb.search_triples(obj, "", "")
+                        for _, rel2, obj2 in tr2:
+                            if rel2.startswith(self.prefixes["rels"]["statement"]) \
+                                    or rel2.startswith(self.prefixes["rels"]["qualifier"]):
+                                if any([obj2.startswith(pr) for pr in self.prefixes["entity"]]):
+                                    objects.add(obj2.split("/")[-1])
+        return frozenset(objects)
+
+    def save_adjacency(self, path: Union[str, Path], entity_ids: Iterable[str]) -> None:
+        """Find neighbours of entities in the knowledge base and save them to **.npz** file which can be used as
+        ``adjacency_filename``.
+
+        Args:
+            path: a path to **.npz** file
+            entity_ids: ids of entities, e.g. the most frequent candidate entities
+
+        Returns:
+            None
+        """
+        entity_ids = sorted(set(entity_ids))
+        neighbours = [sorted(self.search_neighbours(entity_id)) for entity_id in entity_ids]
+        indptr = np.zeros(len(entity_ids) + 1, dtype=np.int64)
+        np.cumsum([len(entity_neighbours) for entity_neighbours in neighbours], out=indptr[1:])
+        np.savez(path, entity_ids=np.array(entity_ids, dtype=str), indptr=indptr,
+                 neighbours=np.array([obj for entity_neighbours in neighbours for obj in entity_neighbours], dtype=str))
+
     def rank_by_connections(self, ids_list):
-        objects_sets_dict, scores_dict, conn_dict = {}, {}, {}
-        for ids in ids_list:
-            for entity_id in ids:
-                scores_dict[entity_id] = 0
-                conn_dict[entity_id] = set()
-        for ids in ids_list:
+        scores_dict = {entity_id: 0 for ids in ids_list for entity_id in ids}
+        entity_lists = defaultdict(set)
+        for i, ids in enumerate(ids_list):
             for entity_id in ids[:self.num_entities_for_conn_ranking]:
-                objects = set()
-                for prefix in self.prefixes["entity"]:
-                    tr, _ = self.kb.search_triples(f"{prefix}/{entity_id}", "", "")
-                    for subj, rel, obj in tr:
-                        if rel.split("/")[-1] not in {"P31", "P279"}:
-                            if any([obj.startswith(pr) for pr in self.prefixes["entity"]]):
-                                objects.add(obj.split("/")[-1])
-                            if rel.startswith(self.prefixes["rels"]["no_type"]):
-                                tr2, _ = self.kb.search_triples(obj, "", "")
-                                for _, rel2, obj2 in tr2:
-                                    if rel2.startswith(self.prefixes["rels"]["statement"]) \
-                                            or rel2.startswith(self.prefixes["rels"]["qualifier"]):
-                                        if any([obj2.startswith(pr) for pr in self.prefixes["entity"]]):
-                                            objects.add(obj2.split("/")[-1])
-                objects_sets_dict[entity_id] = objects
-                for obj in objects:
-                    if obj not in objects_sets_dict:
-                        objects_sets_dict[obj] = set()
-                    objects_sets_dict[obj].add(entity_id)
-
-        for i in range(len(ids_list)):
-            for j in range(len(ids_list)):
-                if i != j:
-                    for entity_id1 in ids_list[i][:self.num_entities_for_conn_ranking]:
-                        for entity_id2 in ids_list[j][:self.num_entities_for_conn_ranking]:
-                            if entity_id1 in objects_sets_dict[entity_id2]:
-                                conn_dict[entity_id1].add(entity_id2)
-                                conn_dict[entity_id2].add(entity_id1)
+                entity_lists[entity_id].add(i)
+        conn_dict = {entity_id: set() for entity_id in entity_lists}
+        for entity_id1 in entity_lists:
+            for entity_id2 in self.get_neighbours(entity_id1).intersection(entity_lists):
+                # entities are connected if they are candidates for different substrings
+                if len(entity_lists[entity_id1] | entity_lists[entity_id2]) > 1:
+                    conn_dict[entity_id1].add(entity_id2)
+                    conn_dict[entity_id2].add(entity_id1)
         for entity_id in conn_dict:
             scores_dict[entity_id] = len(conn_dict[entity_id])
         return scores_dict
@@ -13,8 +13,10 @@
 # limitations under the License.
 
 import itertools
+import json
 import pickle
-from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Union
 
 import numpy as np
 import scipy as sp
@@ -25,6 +27,22 @@ Sparse = sp.sparse.csr_matrix
 
 
 class WordSearcher:
+    """Find dictionary words which are similar to a query word by char bigrams and trigrams.
+
+    The words dictionary is loaded either from a pickled dictionary of words and their tags or from a directory
+    created by :meth:`dump`. Arrays in the directory are memory-mapped, so several processes share the same copy
+    of them.
+
+    Args:
+        words_dict_filename: a path to a pickled dictionary of words and sets of their tags or to a directory with
+            the words dictionary arrays
+        ngrams_matrix_filename: a path to **.npz** file with [n_ngrams X n_words] matrix of ngram counts, words are
+            in alphabetical order
+        lang: language of words, ``"@en"`` or ``"@ru"``
+        thresh: a number of the most similar words which are filtered by the first letter, length and tags
+
+    """
+
     def __init__(self, words_dict_filename: str, ngrams_matrix_filename: str, lang: str = "@en", thresh: int = 1000):
         self.words_dict_filename = words_dict_filename
         self.ngrams_matrix_filename = ngrams_matrix_filename
@@ -39,14 +57,77 @@ class WordSearcher:
         self.make_ngrams_dicts()
 
     def load(self):
-        with open(str(expand_path(self.words_dict_filename)), "rb") as fl:
-            self.words_dict = pickle.load(fl)
-        words_list = list(self.words_dict.keys())
-        self.words_list = sorted(words_list)
+        words_dict_path = expand_path(self.words_dict_filename)
+        if words_dict_path.is_dir():
+            with open(words_dict_path / "meta.json") as fl:
+                tags = json.load(fl)["tags"]
+            arrays = {name: np.load(words_dict_path / f"{name}.npy", mmap_mode="r")
+                      for name in ("words", "offsets", "first_chars", "lengths", "tag_matrix")}
+        else:
+            with open(str(words_dict_path), "rb") as fl:
+                tags, arrays = self.make_arrays(pickle.load(fl))
+        self.tag2id = {tag: i for i, tag in enumerate(tags)}
+        self.words = arrays["words"]
+        self.offsets = arrays["offsets"]
+        self.first_chars = arrays["first_chars"]
+        self.lengths = arrays["lengths"]
+        self.tag_matrix = arrays["tag_matrix"]
 
         loader = np.load(str(expand_path(self.ngrams_matrix_filename)), allow_pickle=True)
         self.count_matrix = Sparse((loader["data"], loader["indices"], loader["indptr"]), shape=loader["shape"])
 
+    @staticmethod
+    def make_arrays(words_dict: Dict[str, Set[str]]):
+        """Convert a dictionary of words and their tags to arrays.
+
+        Args:
+            words_dict: a dictionary of words and sets of their tags
+
+        Returns:
+            a tuple of a list of tags and a dictionary of arrays: concatenated utf-8 encoded words in alphabetical
+            order, word boundaries in them, code points of the first letters and lengths of words and a boolean
+            [n_words X n_tags] matrix of word tags
+        """
+        words_list = sorted(words_dict)
+        tags = sorted(set().union(*words_dict.values()))
+        tag2id = {tag: i for i, tag in enumerate(tags)}
+        encoded = [word.encode("utf-8") for word in words_list]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(word) for word in encoded], out=offsets[1:])
+        tag_matrix = np.zeros((len(words_list), len(tags)), dtype=bool)
+        for i, word in enumerate(words_list):
+            tag_matrix[i, [tag2id[tag] for tag in words_dict[word]]] = True
+        arrays = {
+            "words": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "offsets": offsets,
+            "first_chars": np.array([ord(word[0]) if word else 0 for word in words_list], dtype=np.int32),
+            "lengths": np.array([len(word) for word in words_list], dtype=np.int32),
+            "tag_matrix": tag_matrix
+        }
+        return tags, arrays
+
+    @classmethod
+    def dump(cls, path: Union[str, Path], words_dict: Dict[str, Set[str]]) -> None:
+        """Save the words dictionary to a directory of **.npy** files which can be used as ``words_dict_filename``.
+
+        Args:
+            path: a path to the directory
+            words_dict: a dictionary of words and sets of their tags
+
+        Returns:
+            None
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        tags, arrays = cls.make_arrays(words_dict)
+        for name, array in arrays.items():
+            np.save(path / f"{name}.npy", array)
+        with open(path / "meta.json", "w") as fl:
+            json.dump({"tags": tags}, fl)
+
+    def word(self, num: int) -> str:
+        return self.words[self.offsets[num]:self.offsets[num + 1]].tobytes().decode("utf-8")
+
     def make_ngrams_dicts(self):
         self.bigrams_dict, self.trigrams_dict = {}, {}
         bigram_combs = list(itertools.product(self.letters, self.letters))
@@ -58,45 +139,53 @@ class WordSearcher:
         for cnt, trigram in enumerate(trigram_combs):
             self.trigrams_dict[trigram] = cnt + len(bigram_combs)
 
-    def __call__(self, query, tags):
-        ngrams_list = []
-        for i in range(len(query) - 1):
-            ngram = query[i : i + 2].lower()
-            if ngram in self.bigrams_dict:
-                ngram_id = self.bigrams_dict[ngram]
-                ngrams_list.append(ngram_id)
-        for i in range(len(query) - 2):
-            ngram = query[i : i + 3].lower()
-            if ngram in self.trigrams_dict:
-                ngram_id = self.trigrams_dict[ngram]
-                ngrams_list.append(ngram_id)
-        ngrams_with_cnts = Counter(ngrams_list).most_common()
-        ngram_ids = [elem[0] for elem in ngrams_with_cnts]
-        ngram_cnts = [1 for _ in ngrams_with_cnts]
-
-        indptr = np.array([0, len(ngram_cnts)])
-        query_matrix = Sparse(
-            (ngram_cnts, ngram_ids, indptr), shape=(1, len(self.bigrams_dict) + len(self.trigrams_dict))
-        )
-
-        scores = query_matrix * self.count_matrix
-        scores = np.squeeze(scores.toarray())
-
-        if self.thresh >= len(scores):
-            o = np.argpartition(-scores, len(scores) - 1)[0:self.thresh]
-        else:
-            o = np.argpartition(-scores, self.thresh)[0:self.thresh]
-        o_sort = o[np.argsort(-scores[o])]
-        o_sort = o_sort.tolist()
-
-        found_words = [self.words_list[n] for n in o_sort]
-        found_words = [
-            word
-            for word in found_words
-            if (
-                word.startswith(query[0])
-                and abs(len(word) - len(query)) < 3
-                and self.words_dict[word].intersection(tags)
-            )
-        ]
-        return found_words
+    def get_ngram_ids(self, query: str) -> List[int]:
+        query = query.lower()
+        ngram_ids = {self.bigrams_dict.get(query[i:i + 2]) for i in range(len(query) - 1)}
+        ngram_ids.update(self.trigrams_dict.get(query[i:i + 3]) for i in range(len(query) - 2))
+        ngram_ids.discard(None)
+        return sorted(ngram_ids)
+
+    def __call__(self, query: str, tags: Iterable[str]) -> List[str]:
+        return self.find_words([query], [tags])[0]
+
+    def find_words(self, queries: List[str], tags_list: List[Iterable[str]]) -> List[List[str]]:
+        """Find similar dictionary words for a batch of queries.
+
+        Words are scored by the number of common ngrams with the query, the :attr:`thresh` words with the highest
+        scores are filtered: found words start with the first letter of the query, differ from it in length by less
+        than 3 and have at least one of the query tags. Words without common ngrams with the query are never
+        returned.
+
+        Args:
+            queries: query words
+            tags_list: tags of words to find for every query
+
+        Returns:
+            lists of found words sorted by score in descending order
+        """
+        ngram_ids = [self.get_ngram_ids(query) for query in queries]
+        indptr = np.zeros(len(queries) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in ngram_ids], out=indptr[1:])
+        indices = np.array(list(itertools.chain.from_iterable(ngram_ids)), dtype=np.int64)
+        query_matrix = Sparse((np.ones(len(indices), dtype=self.count_matrix.dtype), indices, indptr),
+                              shape=(len(queries), len(self.bigrams_dict) + len(self.trigrams_dict)))
+        scores_matrix = (query_matrix * self.count_matrix).tocsr()
+
+        found_words_batch = []
+        for i, (query, tags) in enumerate(zip(queries, tags_list)):
+            start, end = scores_matrix.indptr[i], scores_matrix.indptr[i + 1]
+            word_nums, scores = scores_matrix.indices[start:end], scores_matrix.data[start:end]
+            if len(scores) > self.thresh:
+                top = np.argpartition(-scores, self.thresh - 1)[:self.thresh]
+                word_nums, scores = word_nums[top], scores[top]
+            tag_ids = [self.tag2id[tag] for tag in tags if tag in self.tag2id]
+            if not query or not tag_ids:
+                found_words_batch.append([])
+                continue
+            mask = (self.first_chars[word_nums] == ord(query[0])) \
+                & (np.abs(self.lengths[word_nums] - len(query)) < 3) \
+                & self.tag_matrix[word_nums][:, tag_ids].any(axis=1)
+            word_nums, scores = word_nums[mask], scores[mask]
+            found_words_batch.append([self.word(num) for num in word_nums[np.argsort(-scores, kind="stable")]])
+        return found_words_batch
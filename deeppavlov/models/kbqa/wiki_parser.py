@@ -14,13 +14,16 @@
 
 import datetime
 import re
+import threading
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import List, Tuple, Dict, Any, Union
+from typing import List, Tuple, Dict, Any, Union, Iterable
 
 from hdt import HDTDocument
 
 from deeppavlov.core.commands.utils import expand_path
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.file import load_pickle, read_json
 from deeppavlov.core.common.registry import register
 
@@ -36,13 +39,21 @@ class WikiParser:
                  prefixes: Dict[str, Union[str, Dict[str, str]]] = None,
                  rel_q2name_filename: str = None,
                  max_comb_num: int = 1e6,
-                 lang: str = "@en", **kwargs) -> None:
+                 lang: str = "@en",
+                 cache_size: int = 200000,
+                 max_cached_triplets: int = 10000,
+                 n_workers: int = 1, **kwargs) -> None:
         """
 
         Args:
             wiki_filename: file with Wikidata
             file_format: format of Wikidata file
             lang: Russian or English language
+            cache_size: total number of triplets in search results of the most recent triplet patterns which are
+                kept in memory, results are not kept if 0
+            max_cached_triplets: search results with more triplets are not kept in memory
+            n_workers: number of threads to execute queries of a batch in, every thread of the pool searches
+                triplets with its own handle of the HDT file
             **kwargs:
         """
 
@@ -64,8 +75,13 @@ class WikiParser:
         self.prefixes = prefixes
         self.file_format = file_format
         self.wiki_filename = str(expand_path(wiki_filename))
+        self.n_workers = n_workers
+        self._local = threading.local()
+        self._executor = None
         if self.file_format == "hdt":
             self.document = HDTDocument(self.wiki_filename)
+            if self.n_workers > 1:
+                self._executor = ThreadPoolExecutor(self.n_workers, initializer=self._open_document)
         elif self.file_format == "pickle":
             self.document = load_pickle(self.wiki_filename)
             self.parsed_document = {}
@@ -84,119 +100,154 @@ class WikiParser:
         self.max_comb_num = max_comb_num
         self.lang = lang
         self.replace_tokens = [('"', ''), (self.lang, " "), ('$', ' '), ('  ', ' ')]
+        self.max_cached_triplets = max_cached_triplets
+        self.triplets_cache = None
+        if cache_size > 0:
+            self.triplets_cache = LRUCache(cache_size, size_of=lambda result: max(len(result[0]), 1))
 
     def __call__(self, parser_info_list: List[str], queries_list: List[Any]) -> List[Any]:
         wiki_parser_output = self.execute_queries_list(parser_info_list, queries_list)
         return wiki_parser_output
 
+    def destroy(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
     def execute_queries_list(self, parser_info_list: List[str], queries_list: List[Any]):
-        wiki_parser_output = []
+        query_answer_types_list = []
         query_answer_types = []
         for parser_info, query in zip(parser_info_list, queries_list):
-            if parser_info == "query_execute":
-                answers, found_rels, found_combs = [], [], []
-                try:
-                    what_return, rels_from_query, query_seq, filter_info, order_info, answer_types, rel_types, \
-                    return_if_found = query
-                    if answer_types:
-                        query_answer_types = answer_types
-                    answers, found_rels, found_combs = \
-                        self.execute(what_return, rels_from_query, query_seq, filter_info, order_info,
-                                     query_answer_types, rel_types)
-                except ValueError:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append([answers, found_rels, found_combs])
-            elif parser_info == "find_rels":
-                rels = []
-                try:
-                    rels = self.find_rels(*query)
-                except:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(rels)
-            elif parser_info == "find_rels_2hop":
-                rels = []
-                try:
-                    rels = self.find_rels_2hop(*query)
-                except ValueError:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output += rels
-            elif parser_info == "find_object":
-                objects = []
-                try:
-                    objects = self.find_object(*query)
-                except:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(objects)
-            elif parser_info == "check_triplet":
-                check_res = False
-                try:
-                    check_res = self.check_triplet(*query)
-                except:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(check_res)
-            elif parser_info == "find_label":
-                label = ""
-                try:
-                    label = self.find_label(*query)
-                except:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(label)
-            elif parser_info == "find_types":
-                types = []
+            # answer types of a query are used for the next queries without them
+            if parser_info == "query_execute" and isinstance(query, (list, tuple)) and len(query) == 8 \
+                    and query[5]:
+                query_answer_types = query[5]
+            query_answer_types_list.append(query_answer_types)
+
+        if self._executor is not None:
+            outputs = self._executor.map(self.execute_query, parser_info_list, queries_list, query_answer_types_list)
+        else:
+            outputs = map(self.execute_query, parser_info_list, queries_list, query_answer_types_list)
+        wiki_parser_output = []
+        for output in outputs:
+            wiki_parser_output += output
+        return wiki_parser_output
+
+    def execute_query(self, parser_info: str, query: Any, query_answer_types: List[str]) -> List[Any]:
+        """Execute a single query of :meth:`execute_queries_list`.
+
+        Args:
+            parser_info: query type
+            query: query arguments
+            query_answer_types: answer types for ``"query_execute"`` queries, answer types of the last previous
+                query with them are used if the query has no answer types
+
+        Returns:
+            a list of outputs which are added to the output of :meth:`execute_queries_list`
+        """
+        output = []
+        if parser_info == "query_execute":
+            answers, found_rels, found_combs = [], [], []
+            try:
+                what_return, rels_from_query, query_seq, filter_info, order_info, answer_types, rel_types, \
+                return_if_found = query
+                answers, found_rels, found_combs = \
+                    self.execute(what_return, rels_from_query, query_seq, filter_info, order_info,
+                                 query_answer_types, rel_types)
+            except ValueError:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append([answers, found_rels, found_combs])
+        elif parser_info == "find_rels":
+            rels = []
+            try:
+                rels = self.find_rels(*query)
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(rels)
+        elif parser_info == "find_rels_2hop":
+            rels = []
+            try:
+                rels = self.find_rels_2hop(*query)
+            except ValueError:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output += rels
+        elif parser_info == "find_object":
+            objects = []
+            try:
+                objects = self.find_object(*query)
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(objects)
+        elif parser_info == "check_triplet":
+            check_res = False
+            try:
+                check_res = self.check_triplet(*query)
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(check_res)
+        elif parser_info == "find_label":
+            label = ""
+            try:
+                label = self.find_label(*query)
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(label)
+        elif parser_info == "find_types":
+            types = []
+            try:
+                types = self.find_types(query)
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(types)
+        elif parser_info == "fill_triplets":
+            filled_triplets = []
+            try:
+                filled_triplets = self.fill_triplets(*query)
+            except ValueError:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(filled_triplets)
+        elif parser_info == "find_triplets":
+            if self.file_format == "hdt":
+                triplets = []
                 try:
-                    types = self.find_types(query)
+                    triplets_forw, c = self.search_triples(f"{self.prefixes['entity']}/{query}", "", "")
+                    triplets.extend([triplet for triplet in triplets_forw
+                                     if not triplet[2].startswith(self.prefixes["statement"])])
+                    triplets_backw, c = self.search_triples("", "", f"{self.prefixes['entity']}/{query}")
+                    triplets.extend([triplet for triplet in triplets_backw
+                                     if not triplet[0].startswith(self.prefixes["statement"])])
                 except:
                     log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(types)
-            elif parser_info == "fill_triplets":
-                filled_triplets = []
-                try:
-                    filled_triplets = self.fill_triplets(*query)
-                except ValueError:
-                    log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(filled_triplets)
-            elif parser_info == "find_triplets":
-                if self.file_format == "hdt":
-                    triplets = []
-                    try:
-                        triplets_forw, c = self.document.search_triples(f"{self.prefixes['entity']}/{query}", "", "")
-                        triplets.extend([triplet for triplet in triplets_forw
-                                         if not triplet[2].startswith(self.prefixes["statement"])])
-                        triplets_backw, c = self.document.search_triples("", "", f"{self.prefixes['entity']}/{query}")
-                        triplets.extend([triplet for triplet in triplets_backw
-                                         if not triplet[0].startswith(self.prefixes["statement"])])
-                    except:
-                        log.warning("Wrong arguments are passed to wiki_parser")
-                    wiki_parser_output.append(list(triplets))
-                else:
-                    triplets = {}
-                    try:
-                        triplets = self.document.get(query, {})
-                    except:
-                        log.warning("Wrong arguments are passed to wiki_parser")
-                    uncompressed_triplets = {}
-                    if triplets:
-                        if "forw" in triplets:
-                            uncompressed_triplets["forw"] = self.uncompress(triplets["forw"])
-                        if "backw" in triplets:
-                            uncompressed_triplets["backw"] = self.uncompress(triplets["backw"])
-                    wiki_parser_output.append(uncompressed_triplets)
-            elif parser_info == "find_triplets_for_rel":
-                found_triplets = []
+                output.append(list(triplets))
+            else:
+                triplets = {}
                 try:
-                    found_triplets, c = \
-                        self.document.search_triples("", f"{self.prefixes['rels']['direct']}/{query}", "")
+                    triplets = self.document.get(query, {})
                 except:
                     log.warning("Wrong arguments are passed to wiki_parser")
-                wiki_parser_output.append(list(found_triplets))
-            elif parser_info == "parse_triplets" and self.file_format == "pickle":
-                for entity in query:
-                    self.parse_triplets(entity)
-                wiki_parser_output.append("ok")
-            else:
-                raise ValueError("Unsupported query type")
+                uncompressed_triplets = {}
+                if triplets:
+                    if "forw" in triplets:
+                        uncompressed_triplets["forw"] = self.uncompress(triplets["forw"])
+                    if "backw" in triplets:
+                        uncompressed_triplets["backw"] = self.uncompress(triplets["backw"])
+                output.append(uncompressed_triplets)
+        elif parser_info == "find_triplets_for_rel":
+            found_triplets = []
+            try:
+                found_triplets, c = \
+                    self.search_triples("", f"{self.prefixes['rels']['direct']}/{query}", "")
+            except:
+                log.warning("Wrong arguments are passed to wiki_parser")
+            output.append(list(found_triplets))
+        elif parser_info == "parse_triplets" and self.file_format == "pickle":
+            for entity in query:
+                self.parse_triplets(entity)
+            output.append("ok")
+        else:
+            raise ValueError("Unsupported query type")
 
-        return wiki_parser_output
+        return output
 
     def execute(self, what_return: List[str],
                 rels_from_query: List[str],
@@ -353,12 +404,48 @@ class WikiParser:
                 new_comb[key] = comb2[key]
         return new_comb
 
+    def _open_document(self) -> None:
+        self._local.document = HDTDocument(self.wiki_filename)
+
+    def get_document(self) -> HDTDocument:
+        """Get a handle of the HDT file of the current thread of the worker pool or the shared handle."""
+        return getattr(self._local, "document", self.document)
+
+    def search_triples(self, subj: str, rel: str, obj: str) -> Tuple[Iterable[Tuple[str, str, str]], int]:
+        """Search triplets matching the pattern in the HDT file, empty strings match any element.
+
+        Results with at most :attr:`max_cached_triplets` triplets are kept in the cache.
+
+        Args:
+            subj: subject of triplets
+            rel: relation of triplets
+            obj: object of triplets
+
+        Returns:
+            a tuple of found triplets and their number
+        """
+        if self.triplets_cache is None:
+            return self.get_document().search_triples(subj, rel, obj)
+        result = self.triplets_cache.get((subj, rel, obj))
+        if result is None:
+            triplets, cnt = self.get_document().search_triples(subj, rel, obj)
+            if cnt > self.max_cached_triplets:
+                return triplets, cnt
+            result = tuple(triplets), cnt
+            self.triplets_cache.put((subj, rel, obj), result)
+        return result
+
+    @property
+    def cache_stats(self) -> Dict[str, Any]:
+        """Size and hit rate of the triplets cache."""
+        return self.triplets_cache.stats if self.triplets_cache is not None else {}
+
     def search(self, query: List[str], unknown_elem_positions: List[Tuple[int, str]], rel_type):
         query = list(map(lambda elem: "" if elem.startswith('?') else elem, query))
         subj, rel, obj = query
         if self.file_format == "hdt":
             combs = []
-            triplets, cnt = self.document.search_triples(subj, rel, obj)
+            triplets, cnt = self.search_triples(subj, rel, obj)
             if cnt < self.max_comb_num:
                 triplets = list(triplets)
                 if rel == self.prefixes["description"] or rel == self.prefixes["label"]:
@@ -402,7 +489,7 @@ class WikiParser:
                 # "http://www.wikidata.org/entity/Q5513"
 
             if entity.startswith(self.prefixes["entity"]):
-                labels, c = self.document.search_triples(entity, self.prefixes["label"], "")
+                labels, c = self.search_triples(entity, self.prefixes["label"], "")
                 # labels = [["http://www.wikidata.org/entity/Q5513", "http://www.w3.org/2000/01/rdf-schema#label",
                 #                                                    '"Lake Baikal"@en'], ...]
                 for label in labels:
@@ -484,7 +571,7 @@ class WikiParser:
     def find_alias(self, entity: str) -> List[str]:
         aliases = []
         if entity.startswith(self.prefixes["entity"]):
-            labels, cardinality = self.document.search_triples(entity, self.prefixes["alias"], "")
+            labels, cardinality = self.search_triples(entity, self.prefixes["alias"], "")
             aliases = [label[2].strip(self.lang).strip('"') for label in labels if label[2].endswith(self.lang)]
         return aliases
 
@@ -497,7 +584,7 @@ class WikiParser:
                 query = [f"{self.prefixes['entity']}/{entity}", "", ""]
             else:
                 query = ["", "", f"{self.prefixes['entity']}/{entity}"]
-            triplets, c = self.document.search_triples(*query)
+            triplets, c = self.search_triples(*query)
             triplets = list(triplets)
             if isinstance(self.prefixes['rels'][rel_type], str):
                 start_str = f"{self.prefixes['rels'][rel_type]}/P"
@@ -514,19 +601,19 @@ class WikiParser:
         rels = []
         for entity_id in entity_ids:
             for rel_1hop in rels_1hop:
-                triplets, cnt = self.document.search_triples(f"{self.prefixes['entity']}/{entity_id}", rel_1hop, "")
+                triplets, cnt = self.search_triples(f"{self.prefixes['entity']}/{entity_id}", rel_1hop, "")
                 triplets = [triplet for triplet in triplets if triplet[2].startswith(self.prefixes['entity'])]
                 objects_1hop = [triplet[2].split("/")[-1] for triplet in triplets]
-                triplets, cnt = self.document.search_triples("", rel_1hop, f"{self.prefixes['entity']}/{entity_id}")
+                triplets, cnt = self.search_triples("", rel_1hop, f"{self.prefixes['entity']}/{entity_id}")
                 triplets = [triplet for triplet in triplets if triplet[0].startswith(self.prefixes['entity'])]
                 objects_1hop += [triplet[0].split("/")[-1] for triplet in triplets]
                 for object_1hop in objects_1hop[:5]:
-                    tr_2hop, cnt = self.document.search_triples(f"{self.prefixes['entity']}/{object_1hop}", "", "")
+                    tr_2hop, cnt = self.search_triples(f"{self.prefixes['entity']}/{object_1hop}", "", "")
                     rels_2hop = [elem[1] for elem in tr_2hop if elem[1] != rel_1hop]
                     if self.used_rels:
                         rels_2hop = [elem for elem in rels_2hop if elem.split("/")[-1] in self.used_rels]
                     rels += rels_2hop
-                    tr_2hop, cnt = self.document.search_triples("", "", f"{self.prefixes['entity']}/{object_1hop}")
+                    tr_2hop, cnt = self.search_triples("", "", f"{self.prefixes['entity']}/{object_1hop}")
                     rels_2hop = [elem[1] for elem in tr_2hop if elem[1] != rel_1hop]
                     if self.used_rels:
                         rels_2hop = [elem for elem in rels_2hop if elem.split("/")[-1] in self.used_rels]
@@ -542,11 +629,11 @@ class WikiParser:
             entity = f"{self.prefixes['entity']}/{entity.split('/')[-1]}"
             rel = f"{self.prefixes['rels']['direct']}/{rel}"
             if direction == "forw":
-                triplets, cnt = self.document.search_triples(entity, rel, "")
+                triplets, cnt = self.search_triples(entity, rel, "")
                 if cnt < self.max_comb_num:
                     objects.extend([triplet[2].split('/')[-1] for triplet in triplets])
             else:
-                triplets, cnt = self.document.search_triples("", rel, entity)
+                triplets, cnt = self.search_triples("", rel, entity)
                 objects.extend([triplet[0].split('/')[-1] for triplet in triplets])
         else:
             entity = entity.split('/')[-1]
@@ -563,7 +650,7 @@ class WikiParser:
             subj = f"{self.prefixes['entity']}/{subj}"
             rel = f"{self.prefixes['rels']['direct']}/{rel}"
             obj = f"{self.prefixes['entity']}/{obj}"
-            triplets, cnt = self.document.search_triples(subj, rel, obj)
+            triplets, cnt = self.search_triples(subj, rel, obj)
             if cnt > 0:
                 return True
             else:
@@ -586,10 +673,10 @@ class WikiParser:
         if self.file_format == "hdt":
             if not entity.startswith("http"):
                 entity = f"{self.prefixes['entity']}/{entity}"
-            tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/P31", "")
+            tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/P31", "")
             types = [triplet[2].split('/')[-1] for triplet in tr]
             for rel in ["P106", "P21"]:
-                tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/{rel}", "")
+                tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/{rel}", "")
                 types += [triplet[2].split('/')[-1] for triplet in tr]
 
         if self.file_format == "pickle":
@@ -607,7 +694,7 @@ class WikiParser:
         if self.file_format == "hdt":
             if not entity.startswith("http"):
                 entity = f"{self.prefixes['entity']}/{entity}"
-            tr, c = self.document.search_triples(entity, f"{self.prefixes['rels']['direct']}/P279", "")
+            tr, c = self.search_triples(entity, f"{self.prefixes['rels']['direct']}/P279", "")
             types = [triplet[2].split('/')[-1] for triplet in tr]
         if self.file_format == "pickle":
             entity = entity.split('/')[-1]
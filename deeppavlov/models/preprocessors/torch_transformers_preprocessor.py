@@ -121,9 +121,15 @@ class TorchTransformersPreprocessor(Component):
             a path to a `directory` containing vocabulary files required by the tokenizer.
         do_lower_case: set True if lowercasing is needed
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
+        padding: padding strategy. ``'max_length'`` pads every sequence to ``max_seq_length``, ``'longest'`` pads
+            sequences to the longest sequence in the batch
+        pad_to_multiple_of: if set, padded length is rounded up to a multiple of this value, ``max_seq_length``
+            should be a multiple of it
 
     Attributes:
         max_seq_length: max sequence length in subtokens, including [SEP] and [CLS] tokens
+        padding: padding strategy
+        pad_to_multiple_of: padded length is rounded up to a multiple of this value
         tokenizer: instance of Bert FullTokenizer
 
     """
@@ -132,8 +138,17 @@ class TorchTransformersPreprocessor(Component):
                  vocab_file: str,
                  do_lower_case: bool = True,
                  max_seq_length: int = 512,
+                 padding: str = 'max_length',
+                 pad_to_multiple_of: Optional[int] = None,
                  **kwargs) -> None:
+        if padding not in ('max_length', 'longest'):
+            raise ValueError(f'padding should be either "max_length" or "longest", got "{padding}"')
+        if pad_to_multiple_of is not None and (pad_to_multiple_of < 1 or max_seq_length % pad_to_multiple_of):
+            raise ValueError(f'max_seq_length should be a multiple of pad_to_multiple_of, so padded sequences are not '
+                             f'longer than max_seq_length, got {max_seq_length} and {pad_to_multiple_of}')
         self.max_seq_length = max_seq_length
+        self.padding = padding
+        self.pad_to_multiple_of = pad_to_multiple_of
         self.tokenizer = AutoTokenizer.from_pretrained(vocab_file, do_lower_case=do_lower_case, **kwargs)
 
     def __call__(self, texts_a: List, texts_b: Optional[List[str]] = None) -> Union[List[InputFeatures],
@@ -163,7 +178,8 @@ class TorchTransformersPreprocessor(Component):
                                         text_pair=texts_b,
                                         add_special_tokens=True,
                                         max_length=self.max_seq_length,
-                                        padding='max_length',
+                                        padding=self.padding,
+                                        pad_to_multiple_of=self.pad_to_multiple_of,
                                         return_attention_mask=True,
                                         truncation=True,
                                         return_tensors='pt')
@@ -12,15 +12,22 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import Counter
+import json
+import shutil
+import tempfile
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import Future, ProcessPoolExecutor
 from logging import getLogger
-from typing import List, Any, Generator, Tuple, KeysView, ValuesView, Dict, Optional
+from pathlib import Path
+from typing import List, Any, Deque, Generator, Tuple, Dict, Iterator, Optional, Union
 
 import numpy as np
 import scipy as sp
 from scipy import sparse
 from sklearn.utils import murmurhash3_32
 
+from deeppavlov.core.commands.utils import expand_path
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.core.models.estimator import Estimator
@@ -28,6 +35,7 @@ from deeppavlov.core.models.estimator import Estimator
 logger = getLogger(__name__)
 
 Sparse = sp.sparse.csr_matrix
+CooChunk = Tuple[np.ndarray, np.ndarray, np.ndarray]
 
 
 def hash_(token: str, hash_size: int) -> int:
@@ -43,6 +51,96 @@ def hash_(token: str, hash_size: int) -> int:
     return murmurhash3_32(token, positive=True) % hash_size
 
 
+def count_hashes(tokenizer: Component, docs: List[str], doc_nums: List[int], hash_size: int) -> CooChunk:
+    """Count hashed ngrams of documents.
+
+    Args:
+        tokenizer: a tokenizer class
+        docs: a list of input documents
+        doc_nums: a list of document integer ids
+        hash_size: a hash size
+
+    Returns:
+        a tuple of term hashes, document integer ids and counts arrays of a count matrix in COO format
+
+    """
+    rows, cols, data = [], [], []
+    for ngrams, doc_num in zip(tokenizer(docs), doc_nums):
+        counts = Counter([hash_(gram, hash_size) for gram in ngrams])
+        rows.extend(counts.keys())
+        data.extend(counts.values())
+        cols.extend([doc_num] * len(counts))
+    return np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32), np.array(data, dtype=np.int32)
+
+
+_worker_tokenizer: Optional[Component] = None
+
+
+def _init_worker(tokenizer: Component) -> None:
+    global _worker_tokenizer
+    _worker_tokenizer = tokenizer
+
+
+def _count_hashes_in_worker(docs: List[str], doc_nums: List[int], hash_size: int) -> CooChunk:
+    return count_hashes(_worker_tokenizer, docs, doc_nums, hash_size)
+
+
+class DocIndex(Mapping):
+    """Read-only mapping of document titles to their integer ids stored in numpy arrays.
+
+    Titles are stored as a single utf-8 encoded byte array and an array of offsets, so the arrays can be
+    memory-mapped and shared between processes. A dictionary of titles is built only on the first lookup by title.
+
+    Args:
+        doc_nums: document integer ids in ascending order
+        titles: concatenated utf-8 encoded document titles in order of :attr:`doc_nums`
+        offsets: title boundaries in :attr:`titles`, ``len(doc_nums) + 1`` elements
+
+    """
+
+    def __init__(self, doc_nums: np.ndarray, titles: np.ndarray, offsets: np.ndarray) -> None:
+        self.doc_nums = doc_nums
+        self.titles = titles
+        self.offsets = offsets
+        self._title2num: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_nums)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.title(i) for i in range(len(self)))
+
+    def __getitem__(self, title: str) -> int:
+        if self._title2num is None:
+            self._title2num = {title: int(num) for title, num in zip(self, self.doc_nums)}
+        return self._title2num[title]
+
+    def title(self, position: int) -> str:
+        return self.titles[self.offsets[position]:self.offsets[position + 1]].tobytes().decode('utf-8')
+
+    def inverse(self) -> 'DocTitles':
+        return DocTitles(self)
+
+
+class DocTitles(Mapping):
+    """Read-only mapping of document integer ids to titles from :class:`DocIndex`."""
+
+    def __init__(self, doc_index: DocIndex) -> None:
+        self.doc_index = doc_index
+
+    def __len__(self) -> int:
+        return len(self.doc_index)
+
+    def __iter__(self) -> Iterator[int]:
+        return (int(num) for num in self.doc_index.doc_nums)
+
+    def __getitem__(self, num: int) -> str:
+        position = np.searchsorted(self.doc_index.doc_nums, num)
+        if position == len(self.doc_index) or self.doc_index.doc_nums[position] != num:
+            raise KeyError(num)
+        return self.doc_index.title(position)
+
+
 @register('hashing_tfidf_vectorizer')
 class HashingTfIdfVectorizer(Estimator):
     """Create a tfidf matrix from collection of documents of size [n_documents X n_features(hash_size)].
@@ -51,30 +149,39 @@ class HashingTfIdfVectorizer(Estimator):
         tokenizer: a tokenizer class
         hash_size: a hash size, power of two
         doc_index: a dictionary of document ids and their titles
-        save_path: a path to **.npz** file where tfidf matrix is saved
-        load_path: a path to **.npz** file where tfidf matrix is loaded from
+        save_path: a path to **.npz** file or to a directory where tfidf matrix is saved
+        load_path: a path to **.npz** file or to a directory where tfidf matrix is loaded from. Matrix and
+         document index in a directory are stored as **.npy** arrays and are memory-mapped on load, so several
+         processes share the same copy of them
+        n_workers: a number of processes to tokenize and count documents in while fitting. Every batch passed
+         to :meth:`partial_fit` is split into :attr:`n_workers` shards, next batches are read while the shards are
+         processed
+        spill_path: a directory where counts of fitted batches are stored until the matrix is built in
+         :meth:`save`. Counts are kept in memory if not set
 
     Attributes:
         hash_size: a hash size
         tokenizer: instance of a tokenizer class
         term_freqs: a dictionary with tfidf terms and their frequences
         doc_index: provided by a user ids or generated automatically ids
-        rows: tfidf matrix rows corresponding to terms
-        cols: tfidf matrix cols corresponding to docs
-        data: tfidf matrix data corresponding to tfidf values
+        chunks: count matrix chunks in COO format or paths to **.npz** files with them
 
     """
 
     def __init__(self, tokenizer: Component, hash_size=2 ** 24, doc_index: Optional[dict] = None,
-                 save_path: Optional[str] = None, load_path: Optional[str] = None, **kwargs):
+                 save_path: Optional[str] = None, load_path: Optional[str] = None, n_workers: int = 1,
+                 spill_path: Optional[str] = None, **kwargs):
 
         super().__init__(save_path=save_path, load_path=load_path, mode=kwargs.get('mode', 'infer'))
 
         self.hash_size = hash_size
         self.tokenizer = tokenizer
-        self.rows = []
-        self.cols = []
-        self.data = []
+        self.n_workers = n_workers
+        self.spill_path = expand_path(spill_path) if spill_path else None
+        self.chunks: List[Union[CooChunk, Path]] = []
+        self._spill_dir: Optional[Path] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Deque[Future] = deque()
 
         if kwargs.get('mode', 'infer') == 'infer':
             self.tfidf_matrix, opts = self.load()
@@ -98,91 +205,106 @@ class HashingTfIdfVectorizer(Estimator):
 
         """
 
-        sp_tfidfs = []
-
-        for question in questions:
-            ngrams = list(self.tokenizer([question]))
-            hashes = [hash_(ngram, self.hash_size) for ngram in ngrams[0]]
-
-            hashes_unique, q_hashes = np.unique(hashes, return_counts=True)
-            tfs = np.log1p(q_hashes)
+        if not questions:
+            return Sparse((0, self.hash_size), dtype=np.float32)
 
-            if len(q_hashes) == 0:
-                sp_tfidfs.append(Sparse((1, self.hash_size)))
-                continue
+        batch_ngrams = list(self.tokenizer(questions))
 
-            size = len(self.doc_index)
-            Ns = self.term_freqs[hashes_unique]
-            idfs = np.log((size - Ns + 0.5) / (Ns + 0.5))
-            idfs[idfs < 0] = 0
+        # every distinct ngram of the batch is hashed once, murmurhash3_32 hashes strings one by one
+        ngram_ids = {}
+        ids = [ngram_ids.setdefault(ngram, len(ngram_ids)) for ngrams in batch_ngrams for ngram in ngrams]
+        ngram_hashes = np.array([hash_(ngram, self.hash_size) for ngram in ngram_ids], dtype=np.int64)
+        hashes = ngram_hashes[np.array(ids, dtype=np.int64)]
+        rows = np.repeat(np.arange(len(batch_ngrams)), [len(ngrams) for ngrams in batch_ngrams])
 
-            tfidf = np.multiply(tfs, idfs).astype("float32")
+        # duplicates are summed up, so the matrix contains ngram counts
+        transformed = Sparse((np.ones(len(hashes)), (rows, hashes)), shape=(len(batch_ngrams), self.hash_size))
+        tfs = np.log1p(transformed.data)
 
-            indptr = np.array([0, len(hashes_unique)])
-            sp_tfidf = Sparse((tfidf, hashes_unique, indptr), shape=(1, self.hash_size)
-                              )
-            sp_tfidfs.append(sp_tfidf)
+        size = len(self.doc_index)
+        Ns = self.term_freqs[transformed.indices]
+        idfs = np.log((size - Ns + 0.5) / (Ns + 0.5))
+        idfs[idfs < 0] = 0
 
-        transformed = sp.sparse.vstack(sp_tfidfs)
+        transformed.data = np.multiply(tfs, idfs).astype("float32")
         return transformed
 
-    def get_index2doc(self) -> Dict[Any, int]:
+    def get_index2doc(self) -> Mapping:
         """Invert doc_index.
 
         Returns:
             inverted doc_index dict
 
         """
+        if isinstance(self.doc_index, DocIndex):
+            return self.doc_index.inverse()
         return dict(zip(self.doc_index.values(), self.doc_index.keys()))
 
-    def get_counts(self, docs: List[str], doc_ids: List[Any]) \
-            -> Generator[Tuple[KeysView, ValuesView, List[int]], Any, None]:
-        """Get term counts for a list of documents.
+    def merge_chunks(self, size: int) -> Sparse:
+        """Build count matrix from :attr:`chunks` in two streaming passes without concatenation of the chunks.
 
-        Args:
-            docs: a list of input documents
-            doc_ids: a list of document ids corresponding to input documents
-
-        Yields:
-            a tuple of term hashes, count values and column ids
-
-        Returns:
-            None
-
-        """
-        logger.debug("Tokenizing batch...")
-        batch_ngrams = list(self.tokenizer(docs))
-        logger.debug("Counting hash...")
-        doc_id = iter(doc_ids)
-        for ngrams in batch_ngrams:
-            counts = Counter([hash_(gram, self.hash_size) for gram in ngrams])
-            hashes = counts.keys()
-            values = counts.values()
-            _id = self.doc_index[next(doc_id)]
-            if values:
-                col_id = [_id] * len(values)
-            else:
-                col_id = []
-            yield hashes, values, col_id
-
-    def get_count_matrix(self, row: List[int], col: List[int], data: List[int], size: int) \
-            -> Sparse:
-        """Get count matrix.
+        The first pass counts postings of every term, the second one puts the chunks into preallocated arrays.
 
         Args:
-            row: tfidf matrix rows corresponding to terms
-            col:  tfidf matrix cols corresponding to docs
-            data: tfidf matrix data corresponding to tfidf values
             size: :attr:`doc_index` size
 
         Returns:
             a count csr_matrix
 
         """
-        count_matrix = Sparse((data, (row, col)), shape=(self.hash_size, size))
+        row_counts = np.zeros(self.hash_size, dtype=np.int64)
+        for rows, _, _ in self._iter_chunks():
+            terms, counts = np.unique(rows, return_counts=True)
+            row_counts[terms] += counts
+
+        indptr = np.zeros(self.hash_size + 1, dtype=np.int64)
+        np.cumsum(row_counts, out=indptr[1:])
+        del row_counts
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        data = np.empty(indptr[-1], dtype=np.int32)
+        cursor = indptr[:-1].copy()
+
+        for rows, cols, counts in self._iter_chunks():
+            order = np.argsort(rows, kind='stable')
+            rows = rows[order]
+            terms, term_starts, term_counts = np.unique(rows, return_index=True, return_counts=True)
+            positions = cursor[rows] + np.arange(len(rows)) - np.repeat(term_starts, term_counts)
+            indices[positions] = cols[order]
+            data[positions] = counts[order]
+            cursor[terms] += term_counts
+
+        count_matrix = Sparse((data, indices, indptr), shape=(self.hash_size, size))
         count_matrix.sum_duplicates()
         return count_matrix
 
+    def _iter_chunks(self) -> Generator[CooChunk, Any, None]:
+        for chunk in self.chunks:
+            if isinstance(chunk, Path):
+                with np.load(chunk) as loader:
+                    yield loader['rows'], loader['cols'], loader['data']
+            else:
+                yield chunk
+
+    def _add_chunk(self, chunk: CooChunk) -> None:
+        if self.spill_path is None:
+            self.chunks.append(chunk)
+            return
+        if self._spill_dir is None:
+            self.spill_path.mkdir(parents=True, exist_ok=True)
+            self._spill_dir = Path(tempfile.mkdtemp(dir=self.spill_path))
+        path = self._spill_dir / f'chunk_{len(self.chunks)}.npz'
+        rows, cols, data = chunk
+        np.savez(path, rows=rows, cols=cols, data=data)
+        self.chunks.append(path)
+
+    def _collect(self, wait_all: bool = False) -> None:
+        """Add counts of processed shards to :attr:`chunks` keeping at most two shards per worker in flight."""
+        while self._pending and (wait_all or len(self._pending) > 2 * self.n_workers or self._pending[0].done()):
+            self._add_chunk(self._pending.popleft().result())
+        if wait_all and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     @staticmethod
     def get_tfidf_matrix(count_matrix: Sparse) -> Tuple[Sparse, np.array]:
         """Convert a count matrix into a tfidf matrix.
@@ -205,15 +327,15 @@ class HashingTfIdfVectorizer(Estimator):
         return tfidfs, term_freqs
 
     def save(self) -> None:
-        """Save tfidf matrix into **.npz** format.
+        """Save tfidf matrix into **.npz** format or into a directory of **.npy** files.
 
         Returns:
             None
 
         """
+        self._collect(wait_all=True)
         logger.info("Saving tfidf matrix to {}".format(self.save_path))
-        count_matrix = self.get_count_matrix(self.rows, self.cols, self.data,
-                                             size=len(self.doc_index))
+        count_matrix = self.merge_chunks(size=len(self.doc_index))
         tfidf_matrix, term_freqs = self.get_tfidf_matrix(count_matrix)
         self.term_freqs = term_freqs
 
@@ -222,28 +344,73 @@ class HashingTfIdfVectorizer(Estimator):
                 'doc_index': self.doc_index,
                 'term_freqs': self.term_freqs}
 
-        data = {
-            'data': tfidf_matrix.data,
-            'indices': tfidf_matrix.indices,
-            'indptr': tfidf_matrix.indptr,
-            'shape': tfidf_matrix.shape,
-            'opts': opts
-        }
-        np.savez(self.save_path, **data)
+        self.dump(self.save_path, tfidf_matrix, opts)
 
         # release memory
         self.reset()
 
+    @staticmethod
+    def dump(path: Union[str, Path], tfidf_matrix: Sparse, opts: Dict) -> None:
+        """Save tfidf matrix and its options to **.npz** file or to a directory of **.npy** files.
+
+        The method can be used to convert an **.npz** file to the directory format:
+        ``HashingTfIdfVectorizer.dump(dir_path, *vectorizer.load())``.
+
+        Args:
+            path: a path to **.npz** file or to a directory
+            tfidf_matrix: a tfidf matrix
+            opts: a dictionary with ``hash_size``, ``ngram_range``, ``doc_index`` and ``term_freqs`` keys
+
+        Returns:
+            None
+
+        """
+        path = Path(path)
+        if path.suffix == '.npz':
+            data = {
+                'data': tfidf_matrix.data,
+                'indices': tfidf_matrix.indices,
+                'indptr': tfidf_matrix.indptr,
+                'shape': tfidf_matrix.shape,
+                'opts': opts
+            }
+            np.savez(path, **data)
+            return
+
+        path.mkdir(parents=True, exist_ok=True)
+        # loaded arrays are read-only, so the indices can't be sorted after loading
+        tfidf_matrix.sort_indices()
+        for name in ('data', 'indices', 'indptr'):
+            np.save(path / f'{name}.npy', getattr(tfidf_matrix, name))
+        np.save(path / 'term_freqs.npy', np.asarray(opts['term_freqs']))
+
+        doc_index = sorted(opts['doc_index'].items(), key=lambda item: item[1])
+        titles = [str(title).encode('utf-8') for title, _ in doc_index]
+        np.save(path / 'doc_nums.npy', np.array([num for _, num in doc_index], dtype=np.int64))
+        np.save(path / 'doc_titles.npy', np.frombuffer(b''.join(titles), dtype=np.uint8))
+        np.save(path / 'doc_offsets.npy', np.cumsum([0] + [len(title) for title in titles], dtype=np.int64))
+
+        meta = {
+            'hash_size': opts['hash_size'],
+            'ngram_range': list(opts['ngram_range']),
+            'shape': list(tfidf_matrix.shape),
+            'has_sorted_indices': True
+        }
+        with open(path / 'meta.json', 'w') as f:
+            json.dump(meta, f)
+
     def reset(self) -> None:
-        """Clear :attr:`rows`, :attr:`cols` and :attr:`data`
+        """Clear :attr:`chunks` and remove the spilled ones.
 
         Returns:
             None
 
         """
-        self.rows.clear()
-        self.cols.clear()
-        self.data.clear()
+        self._collect(wait_all=True)
+        self.chunks.clear()
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
 
     def load(self) -> Tuple[Sparse, Dict]:
         """Load a tfidf matrix as csr_matrix.
@@ -262,11 +429,32 @@ class HashingTfIdfVectorizer(Estimator):
             raise FileNotFoundError("HashingTfIdfVectorizer path doesn't exist!")
 
         logger.debug("Loading tfidf matrix from {}".format(self.load_path))
+        if self.load_path.is_dir():
+            return self._load_dir(self.load_path)
         loader = np.load(self.load_path, allow_pickle=True)
         matrix = Sparse((loader['data'], loader['indices'],
                          loader['indptr']), shape=loader['shape'])
         return matrix, loader['opts'].item(0)
 
+    @staticmethod
+    def _load_dir(path: Path) -> Tuple[Sparse, Dict]:
+        with open(path / 'meta.json') as f:
+            meta = json.load(f)
+
+        def mmap(name: str) -> np.ndarray:
+            return np.load(path / f'{name}.npy', mmap_mode='r')
+
+        matrix = Sparse((mmap('data'), mmap('indices'), mmap('indptr')), shape=tuple(meta['shape']), copy=False)
+        if meta.get('has_sorted_indices', False):
+            matrix.has_sorted_indices = True
+        opts = {
+            'hash_size': meta['hash_size'],
+            'ngram_range': meta['ngram_range'],
+            'term_freqs': mmap('term_freqs'),
+            'doc_index': DocIndex(mmap('doc_nums'), mmap('doc_titles'), mmap('doc_offsets'))
+        }
+        return matrix, opts
+
     def partial_fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
         """Partially fit on one batch.
 
@@ -279,13 +467,25 @@ class HashingTfIdfVectorizer(Estimator):
             None
 
         """
+        doc_ids = list(doc_ids)
         for doc_id, i in zip(doc_ids, doc_nums):
             self.doc_index[doc_id] = i
-
-        for batch_rows, batch_data, batch_cols in self.get_counts(docs, doc_ids):
-            self.rows.extend(batch_rows)
-            self.cols.extend(batch_cols)
-            self.data.extend(batch_data)
+        doc_nums = [self.doc_index[doc_id] for doc_id in doc_ids]
+
+        if not docs:
+            return
+        if self.n_workers <= 1:
+            self._add_chunk(count_hashes(self.tokenizer, docs, doc_nums, self.hash_size))
+            return
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.n_workers, initializer=_init_worker,
+                                                 initargs=(self.tokenizer,))
+        shard_size = -(-len(docs) // self.n_workers)
+        for start in range(0, len(docs), shard_size):
+            self._pending.append(self._executor.submit(_count_hashes_in_worker, docs[start:start + shard_size],
+                                                       doc_nums[start:start + shard_size], self.hash_size))
+        self._collect()
 
     def fit(self, docs: List[str], doc_ids: List[Any], doc_nums: List[int]) -> None:
         """Fit the vectorizer.
@@ -300,7 +500,5 @@ class HashingTfIdfVectorizer(Estimator):
 
         """
         self.doc_index = {}
-        self.rows = []
-        self.cols = []
-        self.data = []
+        self.reset()
         return self.partial_fit(docs, doc_ids, doc_nums)
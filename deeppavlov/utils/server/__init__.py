@@ -1 +1,2 @@
+from .batcher import RequestBatcher
 from .server import get_server_params, get_ssl_params, redirect_root_to_docs, start_model_server
@@ -0,0 +1,148 @@
+# Copyright 2023 Neural Networks and Deep Learning lab, MIPT
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+from itertools import chain
+from logging import getLogger
+from typing import Any, List, Optional, Sequence, Tuple
+
+from deeppavlov.core.common.chainer import Chainer
+
+log = getLogger(__name__)
+
+
+class RequestBatcher:
+    """Coalesces concurrent model requests into a single model call.
+
+    Requests are collected until the total number of batch elements reaches ``max_batch_size`` or
+    ``max_wait_time`` seconds pass since the first request of the batch arrived. Collected requests are
+    concatenated, passed to the model as one batch with :meth:`~deeppavlov.core.common.chainer.Chainer.acall`
+    and the model prediction is split back per request. A single request larger than ``max_batch_size`` is
+    processed as a separate batch.
+
+    Args:
+        model: Model to infer.
+        max_batch_size: Maximum number of batch elements passed to the model in a single call.
+        max_wait_time: Maximum time in seconds to wait for new requests after the first request of the batch
+            arrived.
+
+    """
+    _queue: Optional[asyncio.Queue]
+    _worker: Optional[asyncio.Task]
+    _pending: Optional[Tuple[Sequence[list], asyncio.Future]]
+
+    def __init__(self, model: Chainer, max_batch_size: int = 64, max_wait_time: float = 0.01) -> None:
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size should be positive, got {max_batch_size}')
+        self._model = model
+        self._max_batch_size = max_batch_size
+        self._max_wait_time = max_wait_time
+        self._queue = None
+        self._worker = None
+        self._pending = None
+
+    async def __call__(self, *model_args: list) -> Any:
+        """Puts request to the queue and waits for the model prediction.
+
+        Args:
+            model_args: Model arguments. All arguments should have the same nonzero length.
+
+        Returns:
+            Model prediction for the request elements in the same format as ``model(*model_args)`` returns.
+
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._pending = None
+            self._worker = asyncio.get_event_loop().create_task(self._run())
+        future = asyncio.get_event_loop().create_future()
+        await self._queue.put((model_args, future))
+        return await future
+
+    async def _get_request(self, timeout: Optional[float] = None) -> Tuple[Sequence[list], asyncio.Future]:
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        if timeout is None:
+            return await self._queue.get()
+        # asyncio.wait_for is not used as it may swallow cancellation of the worker
+        getter = asyncio.ensure_future(self._queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if not done:
+            raise asyncio.TimeoutError
+        return getter.result()
+
+    @staticmethod
+    def _fail(requests: List[Tuple[Sequence[list], asyncio.Future]], exception: Exception) -> None:
+        for _, future in requests:
+            if not future.done():
+                future.set_exception(exception)
+
+    def _get_size(self, request: Tuple[Sequence[list], asyncio.Future]) -> Optional[int]:
+        """Returns the number of batch elements in request or fails the request if it has no length."""
+        try:
+            return len(request[0][0])
+        except Exception as e:
+            log.error(f'got exception {e!r} while adding request to batch')
+            self._fail([request], e)
+            return None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        while True:
+            request = await self._get_request()
+            batch_size = self._get_size(request)
+            if batch_size is None:
+                continue
+            requests = [request]
+            deadline = loop.time() + self._max_wait_time
+            while batch_size < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await self._get_request(timeout)
+                except asyncio.TimeoutError:
+                    break
+                request_size = self._get_size(request)
+                if request_size is None:
+                    continue
+                if batch_size + request_size > self._max_batch_size:
+                    self._pending = request
+                    break
+                requests.append(request)
+                batch_size += request_size
+            await self._process(requests)
+
+    async def _process(self, requests: List[Tuple[Sequence[list], asyncio.Future]]) -> None:
+        try:
+            model_args = [list(chain.from_iterable(arg)) for arg in zip(*(args for args, _ in requests))]
+            prediction = await self._model.acall(*model_args)
+            single_output = len(self._model.out_params) == 1
+            if single_output:
+                prediction = [prediction]
+            start = 0
+            for args, future in requests:
+                end = start + len(args[0])
+                result = [output[start:end] for output in prediction]
+                start = end
+                if not future.done():
+                    future.set_result(result[0] if single_output else result)
+        except Exception as e:
+            log.error(f'got exception {e!r} while processing batch of {len(requests)} requests')
+            self._fail(requests, e)
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import time
-from typing import Tuple
+from pathlib import Path
+from typing import Tuple, Union
 
-from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
-from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, multiprocess, values
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
 from starlette.responses import Response
@@ -24,11 +26,52 @@ from starlette.types import ASGIApp
 
 REQUESTS_COUNT = Counter('http_requests_count', 'Number of processed requests', ['endpoint', 'status_code'])
 REQUESTS_LATENCY = Histogram('http_requests_latency_seconds', 'Request latency histogram', ['endpoint'])
-REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Number of requests currently being processed', ['endpoint'])
+REQUESTS_IN_PROGRESS = Gauge('http_requests_in_progress', 'Number of requests currently being processed', ['endpoint'],
+                             multiprocess_mode='livesum')
+
+COMPONENT_LATENCY = Histogram('chainer_component_latency_seconds', 'Chainer component call latency histogram',
+                              ['component'])
+COMPONENT_BATCH_SIZE = Histogram('chainer_component_batch_size', 'Chainer component batch size histogram',
+                                 ['component'], buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, float('inf')))
+COMPONENT_THROUGHPUT = Histogram('chainer_component_throughput_items_per_second',
+                                 'Chainer component throughput histogram', ['component'],
+                                 buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000, float('inf')))
+
+
+def observe_component(component: str, duration: float, batch_size: int) -> None:
+    """Chainer profiler callback that exports component call statistics to Prometheus."""
+    COMPONENT_LATENCY.labels(component=component).observe(duration)
+    COMPONENT_BATCH_SIZE.labels(component=component).observe(batch_size)
+    if duration > 0:
+        COMPONENT_THROUGHPUT.labels(component=component).observe(batch_size / duration)
+
+
+def setup_multiprocess_metrics(metrics_dir: Union[str, Path]) -> None:
+    """Makes metrics of all forked server workers to be aggregated by the ``/metrics`` endpoint.
+
+    Has to be called before forking workers and before any labeled metric value is created.
+
+    Args:
+        metrics_dir: Directory where workers store their metric values.
+
+    """
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = str(metrics_dir)
+    values.ValueClass = values.MultiProcessValue()
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Removes live gauge values of the finished worker with process id ``pid``."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(pid)
 
 
 def metrics(request: Request) -> Response:
-    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
 
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
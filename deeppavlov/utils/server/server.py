@@ -13,12 +13,18 @@
 # limitations under the License.
 
 import asyncio
+import gc
 import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
 from collections import namedtuple
 from logging import getLogger
 from pathlib import Path
 from ssl import PROTOCOL_TLSv1_2
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 import uvicorn
 from fastapi import Body, FastAPI, HTTPException
@@ -34,10 +40,13 @@ from deeppavlov.core.commands.utils import parse_config
 from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.common.file import read_json
 from deeppavlov.core.common.log import log_config
+from deeppavlov.core.common.profiler import ChainerProfiler
 from deeppavlov.core.common.paths import get_settings_path
 from deeppavlov.core.data.utils import check_nested_dict_keys, jsonify_data
 from deeppavlov.utils.connector import DialogLogger
-from deeppavlov.utils.server.metrics import metrics, PrometheusMiddleware
+from deeppavlov.utils.server.batcher import RequestBatcher
+from deeppavlov.utils.server.metrics import metrics, mark_worker_dead, observe_component, setup_multiprocess_metrics
+from deeppavlov.utils.server.metrics import PrometheusMiddleware
 
 SERVER_CONFIG_PATH = get_settings_path() / 'server_config.json'
 SSLConfig = namedtuple('SSLConfig', ['version', 'keyfile', 'certfile'])
@@ -131,7 +140,8 @@ def redirect_root_to_docs(fast_app: FastAPI, func_name: str, endpoint: str, meth
         return response
 
 
-def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
+def parse_payload(payload: Dict[str, Optional[List]]) -> List[List]:
+    """Validates request payload and converts it to the list of model arguments."""
     model_args = payload.values()
     dialog_logger.log_in(payload)
     error_msg = None
@@ -149,10 +159,11 @@ def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
         raise HTTPException(status_code=400, detail=error_msg)
 
     batch_size = next(iter(lengths))
-    model_args = [arg or [None] * batch_size for arg in model_args]
+    return [arg or [None] * batch_size for arg in model_args]
 
-    prediction = model(*model_args)
 
+def format_prediction(model: Chainer, prediction: Any) -> List:
+    """Converts model prediction to the JSON-serializable response."""
     # TODO: remove in 1.2.0
     if COMPATIBILITY_MODE is not False:
         if len(model.out_params) == 1:
@@ -164,6 +175,21 @@ def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
     return result
 
 
+async def interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List:
+    # payload parsing and response formatting write dialog logs, so they are run outside the event loop
+    loop = asyncio.get_event_loop()
+    model_args = await loop.run_in_executor(None, parse_payload, payload)
+    prediction = await model.acall(*model_args)
+    return await loop.run_in_executor(None, format_prediction, model, prediction)
+
+
+async def interact_batched(batcher: RequestBatcher, model: Chainer, payload: Dict[str, Optional[List]]) -> List:
+    loop = asyncio.get_event_loop()
+    model_args = await loop.run_in_executor(None, parse_payload, payload)
+    prediction = await batcher(*model_args)
+    return await loop.run_in_executor(None, format_prediction, model, prediction)
+
+
 def test_interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List[str]:
     model_args = [arg or ["Test string."] for arg in payload.values()]
     try:
@@ -173,11 +199,99 @@ def test_interact(model: Chainer, payload: Dict[str, Optional[List]]) -> List[st
         raise HTTPException(status_code=400, detail=repr(e))
 
 
+def _fork_worker(config: uvicorn.Config, sock) -> int:
+    """Starts a worker process serving the application from ``sock`` and returns its pid."""
+    pid = os.fork()
+    if pid == 0:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        code = 1
+        try:
+            uvicorn.Server(config).run(sockets=[sock])
+            code = 0
+        except BaseException:
+            log.exception(f'worker {os.getpid()} failed')
+        finally:
+            os._exit(code)
+    return pid
+
+
+def run_workers(config: uvicorn.Config, workers: int, min_uptime: float = 10.) -> None:
+    """Serves the application from ``workers`` forked processes sharing one listening socket.
+
+    Everything created before the call, including the model, is shared between workers in copy-on-write mode, so
+    model weights are not duplicated in memory. Metrics of all workers are aggregated by the ``/metrics`` endpoint.
+    SIGTERM and SIGINT are forwarded to workers. Workers that exit are restarted unless they exited earlier than
+    ``min_uptime`` seconds after the start, which means they fail on start.
+
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError('several workers mode is supported only on platforms with os.fork')
+
+    metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    remove_metrics_dir = metrics_dir is None
+    if remove_metrics_dir:
+        metrics_dir = tempfile.mkdtemp(prefix='deeppavlov_metrics_')
+    setup_multiprocess_metrics(metrics_dir)
+
+    # threads of intra-op parallelism are divided between workers to avoid CPU oversubscription
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+    sock = config.bind_socket()
+    # objects created before fork are excluded from garbage collection to keep their memory pages shared
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    previous_handlers = {signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        for _ in range(workers):
+            if stopping:
+                break
+            children[_fork_worker(config, sock)] = time.monotonic()
+        log.info(f'started {workers} workers with pids {sorted(children)}')
+        while children:
+            pid, status = os.wait()
+            started = children.pop(pid, None)
+            if started is None:
+                continue
+            mark_worker_dead(pid)
+            if stopping:
+                continue
+            if time.monotonic() - started < min_uptime:
+                log.error(f'worker {pid} exited with status {status} right after the start and is not restarted, '
+                          f'{len(children)} of {workers} workers are running')
+            else:
+                new_pid = _fork_worker(config, sock)
+                children[new_pid] = time.monotonic()
+                log.warning(f'worker {pid} exited with status {status}, restarted as {new_pid}')
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        sock.close()
+        if remove_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
 def start_model_server(model_config: Path,
                        https: Optional[bool] = None,
                        ssl_key: Optional[str] = None,
                        ssl_cert: Optional[str] = None,
-                       port: Optional[int] = None) -> None:
+                       port: Optional[int] = None,
+                       dynamic_batching: Optional[bool] = None,
+                       workers: Optional[int] = None,
+                       profile: Optional[bool] = None) -> None:
 
     server_params = get_server_params(model_config)
 
@@ -190,6 +304,15 @@ def start_model_server(model_config: Path,
 
     model = build_model(model_config)
 
+    if profile or server_params.get('profile', False):
+        model.set_profiler(ChainerProfiler(callbacks=[observe_component]))
+
+    batcher = None
+    if dynamic_batching or server_params.get('dynamic_batching', False):
+        batcher = RequestBatcher(model,
+                                 max_batch_size=server_params.get('max_batch_size', 64),
+                                 max_wait_time=server_params.get('max_batch_wait_time', 0.01))
+
     def batch_decorator(cls: ModelMetaclass) -> ModelMetaclass:
         cls.__annotations__ = {arg_name: list for arg_name in model_args_names}
         cls.__fields__ = {arg_name: ModelField(name=arg_name, type_=list, class_validators=None,
@@ -207,8 +330,9 @@ def start_model_server(model_config: Path,
 
     @app.post(model_endpoint, summary='A model endpoint')
     async def answer(item: Batch = Body(..., example=model_endpoint_post_example)) -> List:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, interact, model, item.dict())
+        if batcher is not None:
+            return await interact_batched(batcher, model, item.dict())
+        return await interact(model, item.dict())
 
     @app.post('/probe', include_in_schema=False)
     async def probe(item: Batch) -> List[str]:
@@ -224,5 +348,12 @@ def start_model_server(model_config: Path,
             'out': model.out_params
         }
 
-    uvicorn.run(app, host=host, port=port, log_config=log_config, ssl_version=ssl_config.version,
-                ssl_keyfile=ssl_config.keyfile, ssl_certfile=ssl_config.certfile, timeout_keep_alive=20)
+    workers = workers or server_params.get('workers', 1)
+    if workers > 1:
+        config = uvicorn.Config(app, host=host, port=port, log_config=log_config, ssl_version=ssl_config.version,
+                                ssl_keyfile=ssl_config.keyfile, ssl_certfile=ssl_config.certfile,
+                                timeout_keep_alive=20)
+        run_workers(config, workers)
+    else:
+        uvicorn.run(app, host=host, port=port, log_config=log_config, ssl_version=ssl_config.version,
+                    ssl_keyfile=ssl_config.keyfile, ssl_certfile=ssl_config.certfile, timeout_keep_alive=20)
@@ -1 +1 @@
-from .socket import encode, start_socket_server
+from .socket import decode, encode, start_socket_server
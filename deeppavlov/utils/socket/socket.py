@@ -19,27 +19,66 @@ from pathlib import Path
 from struct import pack, unpack
 from typing import Any, List, Optional, Tuple, Union
 
+import numpy as np
+
 from deeppavlov.core.commands.infer import build_model
 from deeppavlov.core.common.chainer import Chainer
 from deeppavlov.core.data.utils import jsonify_data
 from deeppavlov.utils.connector import DialogLogger
-from deeppavlov.utils.server import get_server_params
+from deeppavlov.utils.server import RequestBatcher, get_server_params
 
 HEADER_FORMAT = '<I'
+NDARRAY_EXT_CODE = 1
 
 log = getLogger(__name__)
 dialog_logger = DialogLogger(logger_name='socket_api')
 
 
-def encode(data: Any) -> bytes:
+def _msgpack_default(obj: Any) -> Any:
+    """Packs numeric numpy arrays to msgpack extension type as raw buffers, other objects are made serializable."""
+    import msgpack
+
+    if isinstance(obj, np.ndarray) and obj.dtype.kind in 'biufc':
+        obj = np.ascontiguousarray(obj)
+        return msgpack.ExtType(NDARRAY_EXT_CODE, msgpack.packb([obj.dtype.str, obj.shape, memoryview(obj)]))
+    serializable = jsonify_data(obj)
+    if serializable is obj:
+        raise TypeError(f'Object of type {type(obj).__name__} is not serializable')
+    return serializable
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    import msgpack
+
+    if code == NDARRAY_EXT_CODE:
+        dtype, shape, buffer = msgpack.unpackb(data)
+        return np.frombuffer(buffer, dtype=dtype).reshape(shape)
+    return msgpack.ExtType(code, data)
+
+
+def is_binary(body: bytes) -> bool:
+    """Checks whether the request or response body is a msgpack serialized dictionary.
+
+    JSON formatted body starts with "{" or whitespace, msgpack map starts with a byte from 0x80-0x8f range or with
+    0xde/0xdf byte.
+
+    """
+    return bool(body) and (0x80 <= body[0] <= 0x8f or body[0] in (0xde, 0xdf))
+
+
+def encode(data: Any, binary: bool = False) -> bytes:
     """Сonverts data to the socket server input formatted bytes array.
 
     Serializes ``data`` to the JSON formatted bytes array and adds 4 bytes to the beginning of the array - packed
     to bytes length of the JSON formatted bytes array. Header format is "<I"
     (see https://docs.python.org/3/library/struct.html#struct-format-strings)
 
+    If ``binary`` is True, ``data`` is serialized with msgpack instead of JSON. Numeric numpy arrays are packed
+    as raw buffers without conversion to lists. Requires ``msgpack`` package.
+
     Args:
         data: Object to pact to the bytes array.
+        binary: Whether to serialize data with msgpack.
 
     Raises:
         TypeError: If data is not JSON-serializable object.
@@ -50,14 +89,41 @@ def encode(data: Any) -> bytes:
         b'\x08\x00\x00\x00{"a": 1}
         >>> encode([42])
         b'\x04\x00\x00\x00[42]'
+        >>> encode({'a':1}, binary=True)
+        b'\x04\x00\x00\x00\x81\xa1a\x01'
 
     """
-    json_data = jsonify_data(data)
-    bytes_data = json.dumps(json_data).encode()
+    if binary:
+        import msgpack
+
+        bytes_data = msgpack.packb(data, default=_msgpack_default)
+    else:
+        json_data = jsonify_data(data)
+        bytes_data = json.dumps(json_data).encode()
     response = pack(HEADER_FORMAT, len(bytes_data)) + bytes_data
     return response
 
 
+def decode(body: bytes) -> Any:
+    """Deserializes the socket server request or response body without the header.
+
+    The body format (JSON or msgpack) is detected by :func:`is_binary`. Numpy arrays packed by :func:`encode` are
+    restored as read-only numpy arrays.
+
+    Args:
+        body: Serialized request or response body.
+
+    Raises:
+        ValueError: If body can't be deserialized.
+
+    """
+    if is_binary(body):
+        import msgpack
+
+        return msgpack.unpackb(body, ext_hook=_msgpack_ext_hook)
+    return json.loads(body)
+
+
 class SocketServer:
     """Creates socket server that sends the received data to the DeepPavlov model and returns model response.
 
@@ -77,9 +143,23 @@ class SocketServer:
         status (str): 'OK' if the model successfully processed the data, else - error message.
         payload: (Optional[List[Tuple]]): The model result if no error has occurred, otherwise None.
 
+    Requests from one connection are processed one by one. If the request body contains 'request_id' key, the
+    server starts processing the request and reads the next one without waiting for the response to be sent, so
+    several requests per connection can be processed simultaneously. Response to such request contains the same
+    'request_id' value, responses order can differ from the requests order. The server stops reading requests from
+    a connection while 'max_in_flight_requests' requests from it are being processed.
+
+    The body can also be a dictionary serialized with msgpack (see :func:`encode`). In this case the response body is
+    serialized with msgpack too and numeric numpy arrays in the model output are sent as raw buffers.
+
+    If dynamic batching is enabled, requests from all connections are collected into batches by
+    :class:`~deeppavlov.utils.server.RequestBatcher` before being sent to the model.
+
     """
+    _batcher: Optional[RequestBatcher]
     _launch_msg: str
     _loop: asyncio.AbstractEventLoop
+    _max_in_flight: int
     _model: Chainer
     _model_args_names: List
 
@@ -87,7 +167,8 @@ class SocketServer:
                  model_config: Path,
                  socket_type: str,
                  port: Optional[int] = None,
-                 socket_file: Optional[Union[str, Path]] = None) -> None:
+                 socket_file: Optional[Union[str, Path]] = None,
+                 dynamic_batching: Optional[bool] = None) -> None:
         """Initializes socket server.
 
         Args:
@@ -97,6 +178,8 @@ class SocketServer:
                 utils/settings/server_config.json is used.
             socket_file: Path to the file to which UNIX Domain Socket server connects. If parameter is not defined,
                 the path from the utils/settings/server_config.json is used.
+            dynamic_batching: Whether to collect requests from all connections into batches. If parameter is not
+                defined, the value from the utils/settings/server_config.json is used.
 
         Raises:
             ValueError: If ``socket_type`` parameter is neither "TCP" nor "UNIX".
@@ -123,6 +206,12 @@ class SocketServer:
 
         self._model = build_model(model_config)
         self._model_args_names = server_params['model_args_names']
+        self._max_in_flight = server_params.get('max_in_flight_requests', 64)
+        self._batcher = None
+        if dynamic_batching or server_params.get('dynamic_batching', False):
+            self._batcher = RequestBatcher(self._model,
+                                           max_batch_size=server_params.get('max_batch_size', 64),
+                                           max_wait_time=server_params.get('max_batch_wait_time', 0.01))
 
     def start(self) -> None:
         """Launches socket server"""
@@ -144,30 +233,62 @@ class SocketServer:
         """
         addr = writer.get_extra_info('peername')
         log.info(f'handling connection from {addr}')
+        write_lock = asyncio.Lock()
+        in_flight = set()
+        # the next requests are not read while all slots are taken
+        slots = asyncio.Semaphore(self._max_in_flight)
         while True:
-            header = await reader.read(4)
-            if not header:
-                log.info(f'closing connection from {addr}')
-                writer.close()
+            try:
+                header = await reader.readexactly(4)
+            except asyncio.IncompleteReadError as e:
+                if e.partial:
+                    log.error(f'header "{e.partial}" length less than 4 bytes')
                 break
-            elif len(header) != 4:
-                error_msg = f'header "{header}" length less than 4 bytes'
+            data_len = unpack(HEADER_FORMAT, header)[0]
+            try:
+                request_body = await reader.readexactly(data_len)
+            except asyncio.IncompleteReadError as e:
+                log.error(f'request body length {len(e.partial)} is less than {data_len} bytes from header')
+                break
+            binary = is_binary(request_body)
+            try:
+                data = decode(request_body)
+            except ImportError:
+                error_msg = 'msgpack package is required to process binary requests'
+                log.error(error_msg)
+                await self._send(writer, write_lock, self._response(error_msg))
+                continue
+            except ValueError:
+                error_msg = f'request "{request_body}" type is not {"msgpack" if binary else "json"}'
                 log.error(error_msg)
-                response = self._response(error_msg)
+                await self._send(writer, write_lock, self._response(error_msg))
+                continue
+            request_id = data.pop('request_id', None) if isinstance(data, dict) else None
+            if request_id is None:
+                await self._send(writer, write_lock, await self._interact(data, binary=binary))
             else:
-                data_len = unpack(HEADER_FORMAT, header)[0]
-                request_body = await reader.read(data_len)
-                try:
-                    data = json.loads(request_body)
-                    response = await self._interact(data)
-                except ValueError:
-                    error_msg = f'request "{request_body}" type is not json'
-                    log.error(error_msg)
-                    response = self._response(error_msg)
+                await slots.acquire()
+                task = self._loop.create_task(self._interact_and_send(data, request_id, binary, writer, write_lock))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                task.add_done_callback(lambda _: slots.release())
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        log.info(f'closing connection from {addr}')
+        writer.close()
+
+    async def _interact_and_send(self, data: dict, request_id: Any, binary: bool, writer: asyncio.StreamWriter,
+                                 write_lock: asyncio.Lock) -> None:
+        response = await self._interact(data, request_id, binary)
+        await self._send(writer, write_lock, response)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, write_lock: asyncio.Lock, response: bytes) -> None:
+        async with write_lock:
             writer.write(response)
             await writer.drain()
 
-    async def _interact(self, data: dict) -> bytes:
+    async def _interact(self, data: dict, request_id: Any = None, binary: bool = False) -> bytes:
         dialog_logger.log_in(data)
         model_args = []
         for param_name in self._model_args_names:
@@ -177,17 +298,17 @@ class SocketServer:
             else:
                 error_msg = f"nonempty array expected but got '{param_name}'={repr(param_value)}"
                 log.error(error_msg)
-                return self._response(error_msg)
+                return self._response(error_msg, request_id=request_id, binary=binary)
         lengths = {len(i) for i in model_args if i is not None}
 
         if not lengths:
             error_msg = 'got empty request'
             log.error(error_msg)
-            return self._response(error_msg)
+            return self._response(error_msg, request_id=request_id, binary=binary)
         elif len(lengths) > 1:
             error_msg = f'got several different batch sizes: {lengths}'
             log.error(error_msg)
-            return self._response(error_msg)
+            return self._response(error_msg, request_id=request_id, binary=binary)
 
         batch_size = list(lengths)[0]
         model_args = [arg or [None] * batch_size for arg in model_args]
@@ -195,30 +316,44 @@ class SocketServer:
         # in case when some parameters were not described in model_args
         model_args += [[None] * batch_size for _ in range(len(self._model.in_x) - len(model_args))]
 
-        prediction = await self._loop.run_in_executor(None, self._model, *model_args)
+        try:
+            if self._batcher is not None:
+                prediction = await self._batcher(*model_args)
+            else:
+                prediction = await self._model.acall(*model_args)
+        except Exception as e:
+            error_msg = f'got exception {e!r} while processing request'
+            log.error(error_msg)
+            return self._response(error_msg, request_id=request_id, binary=binary)
         if len(self._model.out_params) == 1:
             prediction = [prediction]
         prediction = list(zip(*prediction))
         dialog_logger.log_out(prediction)
-        return self._response(payload=prediction)
+        return self._response(payload=prediction, request_id=request_id, binary=binary)
 
     @staticmethod
-    def _response(status: str = 'OK', payload: Optional[List[Tuple]] = None) -> bytes:
+    def _response(status: str = 'OK', payload: Optional[List[Tuple]] = None, request_id: Any = None,
+                  binary: bool = False) -> bytes:
         """Puts arguments into dict and serialize it to JSON formatted byte array with header.
 
         Args:
             status: Response status. 'OK' if no error has occurred, otherwise error message.
             payload: DeepPavlov model result if no error has occurred, otherwise None.
+            request_id: Value of 'request_id' key of the request. Added to the response if not None.
+            binary: Whether to serialize the response with msgpack instead of JSON.
 
         Returns:
-            dict({'status': status, 'payload': payload}) serialized to a JSON formatted byte array starting with the
-                4-byte header - the length of serialized dict in bytes.
+            dict({'status': status, 'payload': payload}) serialized to a JSON formatted (or msgpack) byte array
+                starting with the 4-byte header - the length of serialized dict in bytes.
 
         """
-        return encode({'status': status, 'payload': payload})
+        response = {'status': status, 'payload': payload}
+        if request_id is not None:
+            response['request_id'] = request_id
+        return encode(response, binary)
 
 
 def start_socket_server(model_config: Path, socket_type: str, port: Optional[int],
-                        socket_file: Optional[Union[str, Path]]) -> None:
-    server = SocketServer(model_config, socket_type, port, socket_file)
+                        socket_file: Optional[Union[str, Path]], dynamic_batching: Optional[bool] = None) -> None:
+    server = SocketServer(model_config, socket_type, port, socket_file, dynamic_batching)
     server.start()
@@ -13,8 +13,9 @@
 # limitations under the License.
 
 from logging import getLogger
-from typing import List, Any, Optional, Union
+from typing import List, Any, Dict, Iterable, Optional, Union
 
+from deeppavlov.core.common.cache import LRUCache
 from deeppavlov.core.common.registry import register
 from deeppavlov.core.models.component import Component
 from deeppavlov.dataset_iterators.sqlite_iterator import SQLiteDataIterator
@@ -30,15 +31,19 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
         load_path: a path to local DB file
         join_docs: whether to join extracted docs with ' ' or not
         shuffle: whether to shuffle data or not
+        cache_size: a number of the most recently requested documents to keep in memory, no documents are kept if 0
 
     Attributes:
         join_docs: whether to join extracted docs with ' ' or not
+        cache: contents of the most recently requested documents by their ids
 
     """
 
-    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, **kwargs) -> None:
-        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle)
+    def __init__(self, load_path: str, join_docs: bool = True, shuffle: bool = False, cache_size: int = 0,
+                 **kwargs) -> None:
+        SQLiteDataIterator.__init__(self, load_path=load_path, shuffle=shuffle, **kwargs)
         self.join_docs = join_docs
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
 
     def __call__(self, doc_ids: Optional[List[List[Any]]] = None, *args, **kwargs) -> List[Union[str, List[str]]]:
         """Get the contents of files, stacked by space or as they are.
@@ -54,10 +59,34 @@ class WikiSQLiteVocab(SQLiteDataIterator, Component):
             logger.warning('No doc_ids are provided in WikiSqliteVocab, return all docs')
             doc_ids = [self.get_doc_ids()]
 
+        id2content = self.get_cached_docs_content(doc_id for ids in doc_ids for doc_id in ids)
         for ids in doc_ids:
-            contents = [self.get_doc_content(doc_id) for doc_id in ids]
+            contents = [id2content[doc_id] for doc_id in ids]
             if self.join_docs:
                 contents = ' '.join(contents)
             all_contents.append(contents)
 
         return all_contents
+
+    def get_cached_docs_content(self, doc_ids: Iterable[Any]) -> Dict[Any, Optional[str]]:
+        """Get contents of documents from :attr:`cache` and fetch the rest from the database in bulk.
+
+        Args:
+            doc_ids: document ids
+
+        Returns:
+            a dictionary of document contents by their ids
+        """
+        id2content = {}
+        missing = []
+        for doc_id in dict.fromkeys(doc_ids):
+            content = self.cache.get(doc_id) if self.cache is not None else None
+            if content is None:
+                missing.append(doc_id)
+            else:
+                id2content[doc_id] = content
+        for doc_id, content in zip(missing, self.get_docs_content(missing)):
+            id2content[doc_id] = content
+            if self.cache is not None and content is not None:
+                self.cache.put(doc_id, content)
+        return id2content
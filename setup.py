@@ -81,6 +81,9 @@ if __name__ == '__main__':
             ],
             's3': [
                 'boto3'
+            ],
+            'msgpack': [
+                'msgpack'
             ]
         },
         **read_requirements()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from deeppavlov.core.common.chainer import Chainer
+
+
+class ConcurrencyTracker:
+    """Records the maximum number of components running at the same time."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def component(self, suffix, delay=0.05):
+        def call(batch):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(delay)
+            with self.lock:
+                self.active -= 1
+            return [f'{item}{suffix}' for item in batch]
+
+        return call
+
+
+def make_branches_chainer(tracker, **kwargs):
+    """Chainer with two independent branches joined by the last component."""
+    chainer = Chainer(in_x=['x'], out_params=['z'], **kwargs)
+    chainer.append(tracker.component('a'), ['x'], ['a'])
+    chainer.append(tracker.component('b'), ['x'], ['b'])
+    chainer.append(lambda a, b: [i + j for i, j in zip(a, b)], ['a', 'b'], ['z'])
+    return chainer
+
+
+def test_acall_runs_components_one_by_one_by_default():
+    tracker = ConcurrencyTracker()
+    chainer = make_branches_chainer(tracker)
+    assert asyncio.run(chainer.acall(['x1', 'x2'])) == ['x1ax1b', 'x2ax2b']
+    assert tracker.max_active == 1
+
+
+class CountingComponent:
+    """Doubles batch elements and remembers every batch it was called with."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(list(batch))
+        return [item * 2 for item in batch]
+
+
+def make_cached_chainer(component, **cache):
+    chainer = Chainer(in_x=['x'], out_params=['y'], cache=cache or {'max_size': 10})
+    chainer.append(component, ['x'], ['y'])
+    return chainer
+
+
+def test_cache_hits_and_misses():
+    component = CountingComponent()
+    chainer = make_cached_chainer(component)
+    assert chainer(['a', 'b', 'a']) == ['aa', 'bb', 'aa']
+    assert chainer(['b', 'c', 'a']) == ['bb', 'cc', 'aa']
+    assert component.batches == [['a', 'b'], ['c']]
+    assert chainer.cache.stats['hits'] == 2
+    assert chainer.cache.stats['misses'] == 4
+
+
+def test_cache_keys_are_type_tagged():
+    component = CountingComponent()
+    chainer = make_cached_chainer(component)
+    assert chainer([1, 1.0, True]) == [2, 2.0, 2]
+    assert component.batches == [[1, 1.0, True]]
+    assert Chainer._cache_key({'a': 1, 'b': [2]}) == Chainer._cache_key({'b': (2,), 'a': 1})
+    assert Chainer._cache_key({1: 'a', 'b': 'c'}) is None
+
+
+def test_unhashable_inputs_are_computed():
+    component = CountingComponent()
+    chainer = make_cached_chainer(component)
+    items = [{'a': 1}, {1: 'a', 'b': 'c'}, {1, 2}]
+    assert chainer([[0], items, [0]]) == [[0, 0], items * 2, [0, 0]]
+    assert chainer([[0], items]) == [[0, 0], items * 2]
+    assert component.batches == [[[0], items], [items]]
+
+
+def test_cached_results_are_copied():
+    chainer = Chainer(in_x=['x'], out_params=['y'], cache={'max_size': 10})
+    chainer.append(lambda batch: [[item] for item in batch], ['x'], ['y'])
+    first, second = chainer(['a', 'a'])
+    first.append('b')
+    assert second == ['a']
+    chainer(['a'])[0].append('c')
+    assert chainer(['a']) == [['a']]
+
+
+def test_cache_max_bytes():
+    component = CountingComponent()
+    chainer = make_cached_chainer(component, max_bytes=100)
+    chainer(['a' * 200, 'b'])
+    chainer(['a' * 200, 'b'])
+    assert component.batches == [['a' * 200, 'b'], ['a' * 200]]
+
+
+def test_parallel_call_matches_sequential():
+    tracker = ConcurrencyTracker()
+    sequential = make_branches_chainer(tracker)
+    parallel = make_branches_chainer(tracker, max_workers=2)
+    batch = ['x1', 'x2', 'x3']
+    assert parallel(batch) == sequential(batch) == ['x1ax1b', 'x2ax2b', 'x3ax3b']
+    assert asyncio.run(parallel.acall(batch)) == sequential(batch)
+    assert tracker.max_active == 2
+    parallel.destroy()
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_acall_matches_call(max_workers):
+    chainer = make_branches_chainer(ConcurrencyTracker(), max_workers=max_workers, cache={'max_size': 10})
+    batch = ['x1', 'x2', 'x1']
+    assert asyncio.run(chainer.acall(batch)) == chainer(batch) == ['x1ax1b', 'x2ax2b', 'x1ax1b']
+    chainer.destroy()
+
+
+@pytest.mark.parametrize('use_acall', [False, True])
+def test_parallel_branch_errors_are_raised(use_acall):
+    def failing(batch):
+        raise RuntimeError('branch failed')
+
+    chainer = Chainer(in_x=['x'], out_params=['z'], max_workers=2)
+    chainer.append(ConcurrencyTracker().component('a'), ['x'], ['a'])
+    chainer.append(failing, ['x'], ['b'])
+    chainer.append(lambda a, b: a, ['a', 'b'], ['z'])
+    with pytest.raises(RuntimeError, match='branch failed'):
+        if use_acall:
+            asyncio.run(chainer.acall(['x1']))
+        else:
+            chainer(['x1'])
+    chainer.destroy()
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+
+from deeppavlov.models.doc_retrieval.tfidf_ranker import TfidfRanker
+from deeppavlov.models.vectorizers.hashing_tfidf_vectorizer import HashingTfIdfVectorizer
+
+
+class SplitTokenizer:
+    ngram_range = [1, 1]
+
+    def __call__(self, batch):
+        return [text.split() for text in batch]
+
+
+def test_inverted_index_from_directory_format(tmp_path):
+    rng = random.Random(0)
+    words = [f'w{i}' for i in range(50)]
+    docs = [' '.join(rng.choice(words) for _ in range(rng.randint(3, 20))) for _ in range(200)]
+    index_path = tmp_path / 'tfidf'
+
+    vectorizer = HashingTfIdfVectorizer(SplitTokenizer(), hash_size=2 ** 10, save_path=str(index_path),
+                                        mode='train')
+    vectorizer.fit(docs, [f'doc{i}' for i in range(len(docs))], list(range(len(docs))))
+    vectorizer.save()
+
+    vectorizer = HashingTfIdfVectorizer(SplitTokenizer(), load_path=str(index_path))
+    assert not vectorizer.tfidf_matrix.indices.flags.writeable
+    questions = [' '.join(rng.choice(words) for _ in range(3)) for _ in range(20)]
+    index_ranker = TfidfRanker(vectorizer, top_n=5, backend='inverted_index')
+    matrix_ranker = TfidfRanker(vectorizer, top_n=5, backend='matrix')
+
+    index_ids, index_scores = index_ranker(questions)
+    matrix_ids, matrix_scores = matrix_ranker(questions)
+    for ids1, scores1, ids2, scores2 in zip(index_ids, index_scores, matrix_ids, matrix_scores):
+        np.testing.assert_allclose(scores1, scores2, rtol=1e-5)
+        # documents tied with the last one may be cut off differently
+        above_last = scores2 > scores2[-1] + 1e-5
+        assert set(np.array(ids1)[above_last]) == set(np.array(ids2)[above_last])
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from deeppavlov.utils.server.batcher import RequestBatcher
+
+
+class FakeModel:
+    out_params = ['y']
+
+    def __init__(self, func):
+        self.func = func
+
+    async def acall(self, *args):
+        return self.func(*args)
+
+
+def failing(x):
+    raise RuntimeError('model failed')
+
+
+def run_requests(model, requests, **batcher_kwargs):
+    async def main():
+        batcher = RequestBatcher(model, **batcher_kwargs)
+        results = await asyncio.gather(*(batcher(*args) for args in requests), return_exceptions=True)
+        # the batcher should keep serving requests after failed batches
+        last = await asyncio.gather(asyncio.wait_for(batcher([1, 2]), timeout=5), return_exceptions=True)
+        return results + last
+
+    return asyncio.run(main())
+
+
+def test_batched_requests_are_split():
+    model = FakeModel(lambda x: [i * 2 for i in x])
+    results = run_requests(model, [([1],), ([2, 3],), ([4],)], max_batch_size=4, max_wait_time=0.05)
+    assert results == [[2], [4, 6], [8], [2, 4]]
+
+
+@pytest.mark.parametrize('func,error', [(failing, RuntimeError), (lambda x: len(x), TypeError)])
+def test_model_errors_are_returned_to_all_requests(func, error):
+    model = FakeModel(func)
+    results = run_requests(model, [([1],), ([2, 3],)], max_batch_size=4, max_wait_time=0.05)
+    assert all(isinstance(result, error) for result in results)
+
+
+def test_worker_survives_non_sliceable_output():
+    state = {'calls': 0}
+
+    def func(x):
+        state['calls'] += 1
+        return 0 if state['calls'] == 1 else list(x)
+
+    results = run_requests(FakeModel(func), [([1],)], max_batch_size=4, max_wait_time=0.05)
+    assert isinstance(results[0], TypeError)
+    assert results[1] == [1, 2]
+
+
+def test_request_without_length_fails_alone():
+    model = FakeModel(lambda x: list(x))
+    results = run_requests(model, [(1,), ([2],)], max_batch_size=4, max_wait_time=0.05)
+    assert isinstance(results[0], TypeError)
+    assert results[1:] == [[2], [1, 2]]